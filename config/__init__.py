@@ -1,4 +1,4 @@
 """Конфигурационные модули."""
-from .settings import Settings
+from .settings import Settings, get_settings
 
-__all__ = ['Settings']
+__all__ = ['Settings', 'get_settings']
@@ -1,16 +1,49 @@
 """Настройки приложения."""
 import os
+from functools import lru_cache
 from typing import Optional
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
 
 class Settings(BaseSettings):
     """Настройки приложения."""
     
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False
+    )
+    
     # OpenAI настройки
-    openai_api_key: str = Field(default="", env="OPENAI_API_KEY", description="API ключ OpenAI")
+    openai_api_key: str = Field(default="", description="API ключ OpenAI")
     openai_model: str = Field(default="gpt-4o-mini", description="Модель OpenAI")
+    openai_model_initial: Optional[str] = Field(
+        default=None,
+        description="Модель для начального анализа (по умолчанию openai_model)"
+    )
+    openai_model_update: Optional[str] = Field(
+        default=None,
+        description="Модель для обновлений каждые update_interval секунд (по умолчанию openai_model)"
+    )
+    openai_max_concurrency: int = Field(
+        default=4,
+        description="Максимальное количество одновременных запросов к OpenAI"
+    )
+    openai_rpm: int = Field(default=60, description="Лимит запросов к OpenAI в минуту")
+    openai_seed: int = Field(default=42, description="Seed OpenAI для воспроизводимых решений")
+    decision_cache_ttl: float = Field(
+        default=30.0,
+        description="Время жизни кеша решений для близких рыночных снимков в секундах (0 - без кеша)"
+    )
+    decision_cache_action_ttl: float = Field(
+        default=10.0,
+        description="Время жизни кешированных решений buy/sell/cancel в секундах (не больше decision_cache_ttl)"
+    )
+    use_batch_api: bool = Field(
+        default=False,
+        description="Разрешить OpenAI Batch API для пакетных (не живых) запросов решений"
+    )
     
     # Trading API настройки
     trading_api_base_url: str = Field(
@@ -18,6 +51,18 @@ class Settings(BaseSettings):
         description="Базовый URL торгового API"
     )
     demo_mode: bool = Field(default=False, description="Демо режим торговли")
+    trust_api: bool = Field(
+        default=False,
+        description="Доверять ответам торгового API: данные мониторинга не проверяются по схеме"
+    )
+    max_concurrent_requests: int = Field(
+        default=10,
+        description="Максимальное количество одновременных запросов к торговому API"
+    )
+    monitor_cache_ttl: float = Field(
+        default=0.5,
+        description="Время жизни кеша данных мониторинга в секундах (0 - без кеша)"
+    )
     
     # Торговые настройки
     target_apy: float = Field(default=30.0, description="Целевая годовая доходность в %")
@@ -27,17 +72,35 @@ class Settings(BaseSettings):
     # Риск-менеджмент
     max_risk_per_trade: float = Field(default=2.0, description="Максимальный риск на сделку в %")
     max_open_positions: int = Field(default=3, description="Максимальное количество открытых позиций")
+    min_trade_amount: float = Field(
+        default=10.0,
+        description="Минимальный объем сделки в USDT: меньшие остатки не считаются доступными для торговли"
+    )
+    
+    # Обработка ответов OpenAI
+    strict_status: bool = Field(
+        default=False,
+        description="Строгий режим: неизвестный статус в ответе - ошибка, а не замена на pause"
+    )
     
     # Логирование
     log_level: str = Field(default="INFO", description="Уровень логирования")
     log_file: str = Field(default="tradebot.log", description="Файл логов")
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Возвращает экземпляр настроек, создавая его при первом обращении.
     
-    class Config:
-        """Конфигурация настроек."""
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False
+    Returns:
+        Закешированный экземпляр настроек
+    """
+    return Settings()
 
 
-# Глобальный экземпляр настроек
-settings = Settings()
+def __getattr__(name: str) -> Settings:
+    """Ленивый доступ к глобальному экземпляру `settings` для старого кода."""
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,24 @@
 """Обработчики данных."""
-from .response_parser import ResponseParser
+from .response_parser import (
+    ResponseParser,
+    ResponseParseError,
+    clean_json_response,
+    parse_response,
+    validate_decision,
+    parse_and_validate,
+    parse_orders_decision,
+    decision_to_api_payload,
+    decision_to_api_bytes
+)
 
-__all__ = ['ResponseParser']
+__all__ = [
+    'ResponseParser',
+    'ResponseParseError',
+    'clean_json_response',
+    'parse_response',
+    'validate_decision',
+    'parse_and_validate',
+    'parse_orders_decision',
+    'decision_to_api_payload',
+    'decision_to_api_bytes'
+]
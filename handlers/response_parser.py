@@ -1,340 +1,377 @@
 """Парсер ответов от OpenAI."""
 import json
 import re
-from typing import Union, Dict, Any
+from typing import Any, Callable, Dict, FrozenSet, Union
+import orjson
 from loguru import logger
+from pydantic import TypeAdapter, ValidationError
 
+from config.settings import get_settings
 from models.responses import (
     BuyDecision, 
     SellDecision, 
     CancelDecision, 
     PauseDecision,
-    OrdersCancelDecision,
-    OrdersSellDecision,
     TradingDecision,
     OrdersDecision,
     TradingStatus
 )
 
 
+# Статусы решений, вынесенные в константы модуля
+_PAUSE: str = TradingStatus.PAUSE
+_BUY: str = TradingStatus.BUY
+_SELL: str = TradingStatus.SELL
+_CANCEL: str = TradingStatus.CANCEL
+
+# Валидаторы дискриминированных union-типов решений (выбор модели по полю status)
+_DECISION_ADAPTER: TypeAdapter = TypeAdapter(TradingDecision)
+_ORDERS_DECISION_ADAPTER: TypeAdapter = TypeAdapter(OrdersDecision)
+
+# Построители полезной нагрузки API по типу решения
+_PAYLOAD_BUILDERS: Dict[type, Callable[[Any], Dict[str, Any]]] = {
+    BuyDecision: lambda d: {
+        "action": "buy",
+        "buy_amount": d.buy_amount,
+        "take_profit_percent": d.take_profit_percent,
+        "stop_loss_percent": d.stop_loss_percent
+    },
+    SellDecision: lambda d: {"action": "sell", "sell_amount": d.sell_amount},
+    CancelDecision: lambda d: {"action": "cancel", "order_id": d.order_id},
+    PauseDecision: lambda d: {"action": "pause"},
+}
+
+_VALID_STATUSES: FrozenSet[str] = frozenset((_PAUSE, _BUY, _SELL, _CANCEL))
+_VALID_ORDERS_STATUSES: FrozenSet[str] = frozenset((_PAUSE, _CANCEL, _SELL))
+
+# Быстрый путь для самого частого решения - паузы
+_PAUSE_STATUS_RE = re.compile(r'"status"\s*:\s*"pause"', re.IGNORECASE)
+_RESPONSE_FIELD_RE = re.compile(r'"response"\s*:\s*"([^"\\]*)"')
+
+
+def _is_number(value: Any) -> bool:
+    """Проверяет, что значение - число (bool не считается числом)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
 class ResponseParseError(Exception):
     """Ошибка парсинга ответа."""
     pass
 
 
-class ResponseParser:
+def clean_json_response(response_text: str) -> str:
     """
-    Парсер для обработки ответов от OpenAI.
+    Очищает ответ от лишних символов и извлекает JSON.
     
-    Преобразует JSON ответы в соответствующие типизированные модели.
+    Args:
+        response_text: Сырой ответ от OpenAI
+        
+    Returns:
+        Очищенный JSON текст
     """
+    # Удаляем markdown блоки кода
+    response_text = response_text.replace('```json', '').replace('```', '')
+    
+    # Удаляем лишние пробелы и переносы строк
+    response_text = response_text.strip()
     
-    @staticmethod
-    def clean_json_response(response_text: str) -> str:
-        """
-        Очищает ответ от лишних символов и извлекает JSON.
+    # Пытаемся найти JSON объект в тексте (от первой '{' до последней '}')
+    start = response_text.find('{')
+    end = response_text.rfind('}')
+    if start != -1 and end > start:
+        response_text = response_text[start:end + 1]
+    
+    return response_text
+
+
+def parse_response(response_text: str) -> Union[BuyDecision, SellDecision, CancelDecision, PauseDecision]:
+    """
+    Парсит ответ от OpenAI в соответствующую модель решения.
+    
+    Args:
+        response_text: JSON ответ от OpenAI
         
-        Args:
-            response_text: Сырой ответ от OpenAI
-            
-        Returns:
-            Очищенный JSON текст
-        """
-        # Удаляем markdown блоки кода
-        response_text = re.sub(r'```json\s*', '', response_text)
-        response_text = re.sub(r'```\s*', '', response_text)
+    Returns:
+        Типизированное решение соответствующего типа
         
-        # Удаляем лишние пробелы и переносы строк
-        response_text = response_text.strip()
+    Raises:
+        ResponseParseError: При ошибке парсинга
+    """
+    try:
+        # Очищаем ответ
+        cleaned_text = clean_json_response(response_text)
+        logger.debug("📝 СЫРОЙ ОТВЕТ: {}", response_text)
+        logger.debug("🧹 ОЧИЩЕННЫЙ JSON: {}", cleaned_text)
         
-        # Пытаемся найти JSON объект в тексте
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
-            response_text = json_match.group(0)
+        # Пауза без экранированных символов в объяснении - без полного разбора JSON.
+        # Только для закрытого объекта с единственным ключом status: вложенный
+        # "status": "pause" не должен подменять настоящее решение
+        if (
+            cleaned_text.count('"status"') == 1
+            and cleaned_text.endswith('}')
+            and _PAUSE_STATUS_RE.search(cleaned_text)
+        ):
+            match = _RESPONSE_FIELD_RE.search(cleaned_text)
+            if match is not None:
+                decision = PauseDecision.model_construct(status=_PAUSE, response=match.group(1))
+                logger.info(f"🧭 РЕШЕНИЕ PAUSE: {decision.response}")
+                return decision
         
-        return response_text
-    
-    @staticmethod
-    def parse_response(response_text: str) -> Union[BuyDecision, SellDecision, CancelDecision, PauseDecision]:
-        """
-        Парсит ответ от OpenAI в соответствующую модель решения.
+        # Корректный ответ - разбор JSON и выбор модели по status за один проход pydantic-core
+        try:
+            decision = _DECISION_ADAPTER.validate_json(cleaned_text)
+            logger.info(f"🧭 РЕШЕНИЕ {decision.status.upper()}: {decision.response}")
+            return decision
+        except ValidationError:
+            # Статус в другом регистре, неизвестный статус или битый JSON - подробный разбор ниже
+            pass
         
-        Args:
-            response_text: JSON ответ от OpenAI
-            
-        Returns:
-            Типизированное решение соответствующего типа
-            
-        Raises:
-            ResponseParseError: При ошибке парсинга
-        """
+        # Парсим JSON
         try:
-            # Очищаем ответ
-            cleaned_text = ResponseParser.clean_json_response(response_text)
-            logger.info(f"📝 СЫРОЙ ОТВЕТ: {response_text}")
-            logger.info(f"🧹 ОЧИЩЕННЫЙ JSON: {cleaned_text}")
-            
-            # Парсим JSON
-            try:
-                data = json.loads(cleaned_text)
-                logger.info(f"✅ РАСПАРСЕННЫЙ JSON: {json.dumps(data, ensure_ascii=False, indent=2)}")
-            except json.JSONDecodeError as e:
-                logger.error(f"❌ ОШИБКА ПАРСИНГА JSON: {e}")
-                raise ResponseParseError(f"Некорректный JSON: {e}")
-            
-            # Проверяем наличие обязательных полей
-            if not isinstance(data, dict):
-                raise ResponseParseError("Ответ должен быть JSON объектом")
-            
-            if 'status' not in data:
-                raise ResponseParseError("Отсутствует поле 'status' в ответе")
-            
-            if 'response' not in data:
-                raise ResponseParseError("Отсутствует поле 'response' в ответе")
-            
-            status = data['status'].lower()
-            
-            # Проверяем и исправляем неправильные статусы
-            valid_statuses = ['pause', 'buy', 'sell', 'cancel']
-            if status not in valid_statuses:
-                logger.warning(f"🚨 НЕПРАВИЛЬНЫЙ СТАТУС '{status}' -> ИСПРАВЛЯЮ НА 'pause'")
-                original_status = data['status']
-                status = 'pause'
-                # Исправляем данные
-                data['status'] = status
-                data['response'] = f"Исправлен неправильный статус '{original_status}' на pause. " + str(data.get('response', ''))
-            
-            # Создаем соответствующую модель на основе статуса
-            if status == TradingStatus.PAUSE:
-                decision = PauseDecision(**data)
-                logger.info(f"⏸️  РЕШЕНИЕ ПАУЗА: {decision.response}")
-                return decision
-            
-            elif status == TradingStatus.BUY:
-                # Проверяем наличие дополнительных полей для покупки
-                required_fields = ['buy_amount', 'take_profit_percent', 'stop_loss_percent']
-                missing_fields = [field for field in required_fields if field not in data]
-                
-                if missing_fields:
-                    raise ResponseParseError(f"Отсутствуют поля для решения о покупке: {missing_fields}")
-                
-                decision = BuyDecision(**data)
-                logger.info(f"📈 РЕШЕНИЕ ПОКУПКА: {decision.buy_amount} USDT, TP: {decision.take_profit_percent}%, SL: {decision.stop_loss_percent}% | {decision.response}")
-                return decision
-            
-            elif status == TradingStatus.SELL:
-                # Проверяем наличие дополнительных полей для продажи
-                if 'sell_amount' not in data:
-                    raise ResponseParseError("Отсутствует поле 'sell_amount' для решения о продаже")
-                
-                decision = SellDecision(**data)
-                logger.info(f"📉 РЕШЕНИЕ ПРОДАЖА: {decision.sell_amount} BTC | {decision.response}")
-                return decision
-            
-            elif status == TradingStatus.CANCEL:
-                # Проверяем наличие дополнительных полей для отмены
-                if 'order_id' not in data:
-                    raise ResponseParseError("Отсутствует поле 'order_id' для решения об отмене")
-                
-                decision = CancelDecision(**data)
-                logger.info(f"❌ РЕШЕНИЕ ОТМЕНА: ордер {decision.order_id} | {decision.response}")
-                return decision
-            
-            else:
-                raise ResponseParseError(f"Неизвестный статус: {status}")
-                
-        except ResponseParseError:
-            raise
-        except Exception as e:
-            logger.error(f"Неожиданная ошибка при парсинге ответа: {e}")
-            logger.error(f"Исходный текст: {response_text}")
-            raise ResponseParseError(f"Неожиданная ошибка: {e}")
-    
-    @staticmethod
-    def validate_decision(decision: Union[BuyDecision, SellDecision, CancelDecision, PauseDecision]) -> bool:
-        """
-        Дополнительная валидация торгового решения.
+            data = orjson.loads(cleaned_text)
+            logger.opt(lazy=True).debug(
+                "✅ РАСПАРСЕННЫЙ JSON: {}",
+                lambda: json.dumps(data, ensure_ascii=False, indent=2)
+            )
+        except (orjson.JSONDecodeError, json.JSONDecodeError) as e:
+            logger.error(f"❌ ОШИБКА ПАРСИНГА JSON: {e}")
+            raise ResponseParseError(f"Некорректный JSON: {e}")
         
-        Args:
-            decision: Решение для валидации
-            
-        Returns:
-            True если решение валидно, False в противном случае
-        """
+        # Проверяем наличие обязательных полей
+        if not isinstance(data, dict):
+            raise ResponseParseError("Ответ должен быть JSON объектом")
+        
+        if 'status' not in data:
+            raise ResponseParseError("Отсутствует поле 'status' в ответе")
+        
+        if 'response' not in data:
+            raise ResponseParseError("Отсутствует поле 'response' в ответе")
+        
+        status = data['status'].lower()
+        
+        # Проверяем и исправляем неправильные статусы (кроме строгого режима)
+        if status not in _VALID_STATUSES and not get_settings().strict_status:
+            logger.warning(f"🚨 НЕПРАВИЛЬНЫЙ СТАТУС '{status}' -> ИСПРАВЛЯЮ НА 'pause'")
+            original_status = data['status']
+            status = _PAUSE
+            # Исправляем данные
+            data['status'] = status
+            data['response'] = f"Исправлен неправильный статус '{original_status}' на pause. " + str(data.get('response', ''))
+        else:
+            data['status'] = status
+        
+        # Выбор модели, проверка обязательных полей и типов - за один проход pydantic
         try:
-            if isinstance(decision, BuyDecision):
-                # Проверяем разумность значений для покупки
-                if decision.buy_amount <= 0:
-                    logger.error("Сумма покупки должна быть положительной")
-                    return False
-                
-                if decision.take_profit_percent <= 0 or decision.take_profit_percent > 100:
-                    logger.error("Take Profit должен быть между 0 и 100%")
-                    return False
-                
-                if decision.stop_loss_percent <= 0 or decision.stop_loss_percent > 100:
-                    logger.error("Stop Loss должен быть между 0 и 100%")
-                    return False
-                
-                # Take Profit должен быть больше Stop Loss
-                if decision.take_profit_percent <= decision.stop_loss_percent:
-                    logger.error("Take Profit должен быть больше Stop Loss")
-                    return False
-            
-            elif isinstance(decision, SellDecision):
-                # Проверяем разумность значений для продажи
-                if decision.sell_amount <= 0:
-                    logger.error("Количество для продажи должно быть положительным")
-                    return False
-            
-            elif isinstance(decision, CancelDecision):
-                # Проверяем ID ордера
-                if not decision.order_id or not decision.order_id.strip():
-                    logger.error("ID ордера не может быть пустым")
-                    return False
-            
-            # PauseDecision всегда валидна, если статус правильный
-            
-            logger.debug(f"Решение {type(decision).__name__} прошло валидацию")
-            return True
+            decision = _DECISION_ADAPTER.validate_python(data)
+        except ValidationError as e:
+            raise ResponseParseError(f"Некорректное решение '{status}': {e}")
+        
+        logger.info(f"🧭 РЕШЕНИЕ {status.upper()}: {decision.response}")
+        return decision
             
-        except Exception as e:
-            logger.error(f"Ошибка валидации решения: {e}")
-            return False
+    except ResponseParseError:
+        raise
+    except Exception as e:
+        logger.error(f"Неожиданная ошибка при парсинге ответа: {e}")
+        logger.error(f"Исходный текст: {response_text}")
+        raise ResponseParseError(f"Неожиданная ошибка: {e}")
+
+
+def _validate_buy(decision: BuyDecision) -> bool:
+    """Проверяет типы и разумность параметров покупки."""
+    tp = decision.take_profit_percent
+    sl = decision.stop_loss_percent
+    return (
+        _is_number(decision.buy_amount) and _is_number(tp) and _is_number(sl)
+        and decision.buy_amount > 0
+        and 0 < tp <= 100
+        and 0 < sl <= 100
+        and tp > sl
+    )
+
+
+def _validate_sell(decision: SellDecision) -> bool:
+    """Проверяет количество для продажи."""
+    return _is_number(decision.sell_amount) and decision.sell_amount > 0
+
+
+def _validate_cancel(decision: CancelDecision) -> bool:
+    """Проверяет ID ордера для отмены."""
+    return isinstance(decision.order_id, str) and bool(decision.order_id.strip())
+
+
+def _validate_pause(decision: PauseDecision) -> bool:
+    """PauseDecision всегда валидна, если статус правильный."""
+    return True
+
+
+# Валидаторы решений по типу
+_VALIDATORS: Dict[type, Callable[[Any], bool]] = {
+    BuyDecision: _validate_buy,
+    SellDecision: _validate_sell,
+    CancelDecision: _validate_cancel,
+    PauseDecision: _validate_pause,
+}
+
+
+def validate_decision(decision: Union[BuyDecision, SellDecision, CancelDecision, PauseDecision]) -> bool:
+    """
+    Дополнительная валидация торгового решения.
     
-    @staticmethod
-    def parse_and_validate(response_text: str) -> TradingDecision:
-        """
-        Парсит и валидирует ответ от OpenAI.
+    Args:
+        decision: Решение для валидации
         
-        Args:
-            response_text: JSON ответ от OpenAI
-            
-        Returns:
-            Валидированное торговое решение
-            
-        Raises:
-            ResponseParseError: При ошибке парсинга или валидации
-        """
-        # Парсим ответ
-        decision = ResponseParser.parse_response(response_text)
+    Returns:
+        True если решение валидно, False в противном случае
+    """
+    validator = _VALIDATORS.get(type(decision))
+    if validator is None or not isinstance(decision.response, str):
+        return False
+    try:
+        return validator(decision)
+    except Exception:
+        return False
+
+
+def parse_and_validate(response_text: str) -> TradingDecision:
+    """
+    Парсит и валидирует ответ от OpenAI.
+    
+    Args:
+        response_text: JSON ответ от OpenAI
         
-        # Валидируем решение
-        if not ResponseParser.validate_decision(decision):
-            raise ResponseParseError("Решение не прошло валидацию")
+    Returns:
+        Валидированное торговое решение
         
-        logger.info(f"Успешно распарсено и валидировано решение: {decision.status}")
-        return decision
+    Raises:
+        ResponseParseError: При ошибке парсинга или валидации
+    """
+    # Парсим ответ
+    decision = parse_response(response_text)
+    
+    # Валидируем решение
+    if not validate_decision(decision):
+        logger.error(f"❌ Решение {type(decision).__name__} не прошло валидацию: {decision}")
+        raise ResponseParseError("Решение не прошло валидацию")
     
-    @staticmethod
-    def parse_orders_decision(response_text: str) -> OrdersDecision:
-        """
-        Парсит ответ от OpenAI для решений по ордерам.
+    logger.info(f"Успешно распарсено и валидировано решение: {decision.status}")
+    return decision
+
+
+def parse_orders_decision(response_text: str) -> OrdersDecision:
+    """
+    Парсит ответ от OpenAI для решений по ордерам.
+    
+    Args:
+        response_text: JSON ответ от OpenAI
         
-        Args:
-            response_text: JSON ответ от OpenAI
-            
-        Returns:
-            Типизированное решение по ордерам
-            
-        Raises:
-            ResponseParseError: При ошибке парсинга
-        """
+    Returns:
+        Типизированное решение по ордерам
+        
+    Raises:
+        ResponseParseError: При ошибке парсинга
+    """
+    try:
+        # Очищаем ответ
+        cleaned_text = clean_json_response(response_text)
+        logger.debug("📝 СЫРОЙ ОТВЕТ ПО ОРДЕРАМ: {}", response_text)
+        logger.debug("🧹 ОЧИЩЕННЫЙ JSON ПО ОРДЕРАМ: {}", cleaned_text)
+        
+        # Парсим JSON
         try:
-            # Очищаем ответ
-            cleaned_text = ResponseParser.clean_json_response(response_text)
-            logger.info(f"📝 СЫРОЙ ОТВЕТ ПО ОРДЕРАМ: {response_text}")
-            logger.info(f"🧹 ОЧИЩЕННЫЙ JSON ПО ОРДЕРАМ: {cleaned_text}")
-            
-            # Парсим JSON
-            try:
-                data = json.loads(cleaned_text)
-                logger.info(f"✅ РАСПАРСЕННЫЙ JSON ПО ОРДЕРАМ: {json.dumps(data, ensure_ascii=False, indent=2)}")
-            except json.JSONDecodeError as e:
-                logger.error(f"❌ ОШИБКА ПАРСИНГА JSON ПО ОРДЕРАМ: {e}")
-                raise ResponseParseError(f"Некорректный JSON: {e}")
-            
-            # Проверяем наличие обязательных полей
-            if not isinstance(data, dict):
-                raise ResponseParseError("Ответ должен быть JSON объектом")
-            
-            if 'status' not in data:
-                raise ResponseParseError("Отсутствует поле 'status' в ответе")
-            
-            if 'response' not in data:
-                raise ResponseParseError("Отсутствует поле 'response' в ответе")
-            
-            status = data['status'].lower()
-            
-            # Проверяем и исправляем неправильные статусы для ордеров
-            valid_orders_statuses = ['pause', 'cancel', 'sell']
-            if status not in valid_orders_statuses:
-                logger.warning(f"🚨 НЕПРАВИЛЬНЫЙ СТАТУС ОРДЕРОВ '{status}' -> ИСПРАВЛЯЮ НА 'pause'")
-                status = 'pause'
-                data['status'] = 'pause'
-                data['response'] = f"Исправлен неправильный статус '{data.get('status', 'unknown')}' на 'pause'"
-            
-            # Создаем соответствующее решение
-            if status == 'pause':
-                decision = PauseDecision(**data)
-            elif status == 'cancel':
-                if 'order_id' not in data:
-                    raise ResponseParseError("Для отмены ордера требуется поле 'order_id'")
-                decision = OrdersCancelDecision(**data)
-            elif status == 'sell':
-                # sell_amount может быть None (продать все)
-                decision = OrdersSellDecision(**data)
-            else:
-                raise ResponseParseError(f"Неизвестный статус для ордеров: {status}")
-            
-            logger.success(f"✅ РЕШЕНИЕ ПО ОРДЕРАМ: {type(decision).__name__}")
-            return decision
-            
-        except Exception as e:
-            logger.error(f"Ошибка парсинга решения по ордерам: {e}")
-            # Возвращаем безопасное решение
-            return PauseDecision(
-                status="pause",
-                response=f"Ошибка парсинга: {str(e)}"
+            data = orjson.loads(cleaned_text)
+            logger.opt(lazy=True).debug(
+                "✅ РАСПАРСЕННЫЙ JSON ПО ОРДЕРАМ: {}",
+                lambda: json.dumps(data, ensure_ascii=False, indent=2)
             )
-    
-    @staticmethod
-    def decision_to_api_payload(
-        decision: Union[BuyDecision, SellDecision, CancelDecision, PauseDecision]
-    ) -> Dict[str, Any]:
-        """
-        Преобразует решение в полезную нагрузку для API.
+        except (orjson.JSONDecodeError, json.JSONDecodeError) as e:
+            logger.error(f"❌ ОШИБКА ПАРСИНГА JSON ПО ОРДЕРАМ: {e}")
+            raise ResponseParseError(f"Некорректный JSON: {e}")
         
-        Args:
-            decision: Торговое решение
-            
-        Returns:
-            Словарь с данными для API
-        """
-        if isinstance(decision, BuyDecision):
-            return {
-                "action": "buy",
-                "buy_amount": decision.buy_amount,
-                "take_profit_percent": decision.take_profit_percent,
-                "stop_loss_percent": decision.stop_loss_percent
-            }
+        # Проверяем наличие обязательных полей
+        if not isinstance(data, dict):
+            raise ResponseParseError("Ответ должен быть JSON объектом")
         
-        elif isinstance(decision, SellDecision):
-            return {
-                "action": "sell",
-                "sell_amount": decision.sell_amount
-            }
+        if 'status' not in data:
+            raise ResponseParseError("Отсутствует поле 'status' в ответе")
         
-        elif isinstance(decision, CancelDecision):
-            return {
-                "action": "cancel",
-                "order_id": decision.order_id
-            }
+        if 'response' not in data:
+            raise ResponseParseError("Отсутствует поле 'response' в ответе")
         
-        elif isinstance(decision, PauseDecision):
-            return {
-                "action": "pause"
-            }
+        status = data['status'].lower()
         
+        # Проверяем и исправляем неправильные статусы для ордеров
+        if status not in _VALID_ORDERS_STATUSES:
+            logger.warning(f"🚨 НЕПРАВИЛЬНЫЙ СТАТУС ОРДЕРОВ '{status}' -> ИСПРАВЛЯЮ НА 'pause'")
+            original_status = data['status']
+            data['status'] = _PAUSE
+            data['response'] = f"Исправлен неправильный статус '{original_status}' на 'pause'"
         else:
-            raise ValueError(f"Неизвестный тип решения: {type(decision)}")
+            data['status'] = status
+        
+        # Создаем соответствующее решение (sell_amount может быть None - продать все)
+        decision = _ORDERS_DECISION_ADAPTER.validate_python(data)
+        
+        logger.success(f"✅ РЕШЕНИЕ ПО ОРДЕРАМ: {type(decision).__name__}")
+        return decision
+        
+    except Exception as e:
+        logger.error(f"Ошибка парсинга решения по ордерам: {e}")
+        # Возвращаем безопасное решение
+        return PauseDecision(
+            status="pause",
+            response=f"Ошибка парсинга: {str(e)}"
+        )
+
+
+def decision_to_api_payload(
+    decision: Union[BuyDecision, SellDecision, CancelDecision, PauseDecision]
+) -> Dict[str, Any]:
+    """
+    Преобразует решение в полезную нагрузку для API.
+    
+    Args:
+        decision: Торговое решение
+        
+    Returns:
+        Словарь с данными для API
+    """
+    builder = _PAYLOAD_BUILDERS.get(type(decision))
+    if builder is None:
+        raise ValueError(f"Неизвестный тип решения: {type(decision)}")
+    return builder(decision)
+
+
+def decision_to_api_bytes(
+    decision: Union[BuyDecision, SellDecision, CancelDecision, PauseDecision]
+) -> bytes:
+    """
+    Преобразует решение в готовое тело HTTP запроса.
+    
+    Args:
+        decision: Торговое решение
+        
+    Returns:
+        JSON полезной нагрузки в виде байтов
+    """
+    builder = _PAYLOAD_BUILDERS.get(type(decision))
+    if builder is None:
+        raise ValueError(f"Неизвестный тип решения: {type(decision)}")
+    return orjson.dumps(builder(decision))
+
+
+class ResponseParser:
+    """
+    Парсер для обработки ответов от OpenAI.
+    
+    Обертка над функциями модуля для обратной совместимости:
+    новый код вызывает функции напрямую.
+    """
+    
+    clean_json_response = staticmethod(clean_json_response)
+    parse_response = staticmethod(parse_response)
+    validate_decision = staticmethod(validate_decision)
+    parse_and_validate = staticmethod(parse_and_validate)
+    parse_orders_decision = staticmethod(parse_orders_decision)
+    decision_to_api_payload = staticmethod(decision_to_api_payload)
+    decision_to_api_bytes = staticmethod(decision_to_api_bytes)
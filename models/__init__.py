@@ -1,15 +1,23 @@
 """Модели данных."""
 from .base import BaseModel
-from .trading import TradingDecision, MarketData, OrderData
-from .responses import BuyDecision, SellDecision, CancelDecision, PauseDecision, OrdersCancelDecision, OrdersSellDecision, TradingDecision, OrdersDecision
+from .trading import MarketData, OrderData
+from .responses import (
+    BuyDecision,
+    SellDecision,
+    CancelDecision,
+    PauseDecision,
+    OrdersCancelDecision,
+    OrdersSellDecision,
+    TradingDecision,
+    OrdersDecision
+)
 
 __all__ = [
-    'BaseModel', 
-    'TradingDecision', 
-    'MarketData', 
+    'BaseModel',
+    'MarketData',
     'OrderData',
     'BuyDecision',
-    'SellDecision', 
+    'SellDecision',
     'CancelDecision',
     'PauseDecision',
     'OrdersCancelDecision',
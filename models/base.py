@@ -1,8 +1,8 @@
 """Базовая модель для всех сущностей проекта."""
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
-from pydantic import BaseModel as PydanticBaseModel, Field
+from pydantic import BaseModel as PydanticBaseModel, ConfigDict, Field
 
 
 class BaseModel(PydanticBaseModel):
@@ -11,18 +11,12 @@ class BaseModel(PydanticBaseModel):
     
     Содержит uuid, created_at и updated_at поля.
     """
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), description="Уникальный идентификатор")
-    created_at: datetime = Field(default_factory=datetime.utcnow, description="Время создания")
-    updated_at: Optional[datetime] = Field(default=None, description="Время последнего обновления")
+    model_config = ConfigDict(use_enum_values=True, validate_assignment=True, defer_build=False)
     
-    class Config:
-        """Конфигурация модели."""
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
-        use_enum_values = True
-        validate_assignment = True
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex, description="Уникальный идентификатор")
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), description="Время создания")
+    updated_at: Optional[datetime] = Field(default=None, description="Время последнего обновления")
     
     def update_timestamp(self) -> None:
         """Обновляет timestamp последнего изменения."""
-        self.updated_at = datetime.utcnow()
+        self.updated_at = datetime.now(timezone.utc)
@@ -1,7 +1,15 @@
 """Модели ответов от OpenAI."""
-from typing import Literal, Optional
-from pydantic import Field
-from .base import BaseModel
+from typing import Annotated, Literal, Optional, Union
+from pydantic import BaseModel as PydanticBaseModel, ConfigDict, Field
+
+
+class ResponseBase(PydanticBaseModel):
+    """
+    Легковесная базовая модель для решений OpenAI.
+    
+    Решения - неизменяемые DTO: без uuid, временных меток и валидации присваивания.
+    """
+    model_config = ConfigDict(frozen=True, extra='ignore', validate_assignment=False, defer_build=False)
 
 
 class TradingStatus:
@@ -11,43 +19,49 @@ class TradingStatus:
     CANCEL = "cancel"
 
 
-class PauseDecision(BaseModel):
-    status: Literal[TradingStatus.PAUSE] = Field(..., description="Статус решения: pause")
+class PauseDecision(ResponseBase):
+    status: Literal[TradingStatus.PAUSE] = Field(TradingStatus.PAUSE, description="Статус решения: pause")
     response: str = Field(..., description="Краткое объяснение решения")
 
 
-class BuyDecision(BaseModel):
-    status: Literal[TradingStatus.BUY] = Field(..., description="Статус решения: buy")
+class BuyDecision(ResponseBase):
+    status: Literal[TradingStatus.BUY] = Field(TradingStatus.BUY, description="Статус решения: buy")
     response: str = Field(..., description="Краткое объяснение решения")
     buy_amount: float = Field(..., gt=0, description="Сумма покупки в USDT")
     take_profit_percent: float = Field(..., gt=0, description="Процент тейк-профита")
     stop_loss_percent: float = Field(..., gt=0, description="Процент стоп-лосса")
 
 
-class SellDecision(BaseModel):
-    status: Literal[TradingStatus.SELL] = Field(..., description="Статус решения: sell")
+class SellDecision(ResponseBase):
+    status: Literal[TradingStatus.SELL] = Field(TradingStatus.SELL, description="Статус решения: sell")
     response: str = Field(..., description="Краткое объяснение решения")
     sell_amount: float = Field(..., gt=0, description="Количество BTC для продажи")
 
 
-class CancelDecision(BaseModel):
-    status: Literal[TradingStatus.CANCEL] = Field(..., description="Статус решения: cancel")
+class CancelDecision(ResponseBase):
+    status: Literal[TradingStatus.CANCEL] = Field(TradingStatus.CANCEL, description="Статус решения: cancel")
     response: str = Field(..., description="Краткое объяснение решения")
     order_id: str = Field(..., description="ID ордера для отмены")
 
 
-class OrdersCancelDecision(BaseModel):
-    status: Literal[TradingStatus.CANCEL] = Field(..., description="Статус решения: cancel")
+class OrdersCancelDecision(ResponseBase):
+    status: Literal[TradingStatus.CANCEL] = Field(TradingStatus.CANCEL, description="Статус решения: cancel")
     response: str = Field(..., description="Краткое объяснение решения")
     order_id: str = Field(..., description="ID ордера для отмены")
 
 
-class OrdersSellDecision(BaseModel):
-    status: Literal[TradingStatus.SELL] = Field(..., description="Статус решения: sell")
+class OrdersSellDecision(ResponseBase):
+    status: Literal[TradingStatus.SELL] = Field(TradingStatus.SELL, description="Статус решения: sell")
     response: str = Field(..., description="Краткое объяснение решения")
     sell_amount: Optional[float] = Field(None, gt=0, description="Количество BTC для продажи (если None - продать все)")
 
 
-# Union типы для всех возможных решений
-TradingDecision = PauseDecision | BuyDecision | SellDecision | CancelDecision
-OrdersDecision = PauseDecision | OrdersCancelDecision | OrdersSellDecision
+# Union типы для всех возможных решений (дискриминатор - поле status)
+TradingDecision = Annotated[
+    Union[PauseDecision, BuyDecision, SellDecision, CancelDecision],
+    Field(discriminator='status')
+]
+OrdersDecision = Annotated[
+    Union[PauseDecision, OrdersCancelDecision, OrdersSellDecision],
+    Field(discriminator='status')
+]
@@ -1,8 +1,11 @@
 """Модели для торговых данных."""
+from dataclasses import dataclass
 from typing import List, Dict, Any, Optional
 from enum import Enum
-from pydantic import Field
-from .base import BaseModel
+import msgspec
+import numpy as np
+from pydantic import ConfigDict, Field
+from pydantic.dataclasses import dataclass as pydantic_dataclass
 
 
 class TradingStatus(str, Enum):
@@ -29,85 +32,151 @@ class OrderStatus(str, Enum):
     PARTIALLY_FILLED = "partially_filled"
 
 
-class OrderBookEntry(BaseModel):
+@dataclass(slots=True, frozen=True)
+class OrderBookEntry:
     """Запись в стакане ордеров."""
-    price: str = Field(..., description="Цена")
-    size: str = Field(..., description="Размер")
-    side: str = Field(..., description="Сторона (bid/ask)")
+    price: str  # Цена
+    size: str  # Размер
+    side: str  # Сторона (bid/ask)
 
 
-class Candle(BaseModel):
+@dataclass(slots=True, frozen=True)
+class Candle:
     """Свеча OHLCV."""
-    timestamp: str = Field(..., description="Временная метка")
-    open: str = Field(..., description="Цена открытия")
-    high: str = Field(..., description="Максимальная цена")
-    low: str = Field(..., description="Минимальная цена")
-    close: str = Field(..., description="Цена закрытия")
-    volume: str = Field(..., description="Объем")
+    timestamp: str  # Временная метка
+    open: str  # Цена открытия
+    high: str  # Максимальная цена
+    low: str  # Минимальная цена
+    close: str  # Цена закрытия
+    volume: str  # Объем
 
 
-class Balance(BaseModel):
+@dataclass(slots=True, frozen=True)
+class Balance:
     """Баланс валюты."""
-    USDT: float = Field(default=0.0, description="Баланс USDT")
-    BTC: float = Field(default=0.0, description="Баланс BTC")
+    USDT: float = 0.0  # Баланс USDT
+    BTC: float = 0.0  # Баланс BTC
 
 
-class ActiveOrder(BaseModel):
+@dataclass(slots=True, frozen=True)
+class ActiveOrder:
     """Активный ордер."""
-    instId: str = Field(..., description="Идентификатор инструмента")
-    ordId: str = Field(..., description="ID ордера")
-    px: str = Field(..., description="Цена")
-    sz: str = Field(..., description="Размер")
-    side: str = Field(..., description="Сторона (buy/sell)")
-    ordType: str = Field(..., description="Тип ордера")
-    state: str = Field(..., description="Состояние ордера")
-    cTime: str = Field(..., description="Время создания")
-    uTime: str = Field(..., description="Время обновления")
-
-
-class Indicators(BaseModel):
+    instId: str  # Идентификатор инструмента
+    ordId: str  # ID ордера
+    px: str  # Цена
+    sz: str  # Размер
+    side: str  # Сторона (buy/sell)
+    ordType: str  # Тип ордера
+    state: str  # Состояние ордера
+    cTime: str  # Время создания
+    uTime: str  # Время обновления
+
+
+@dataclass(slots=True, frozen=True)
+class Indicators:
     """Рыночные индикаторы."""
-    current_price: str = Field(default="0", description="Текущая цена")
-    volume_24h: str = Field(default="0", description="Объем за 24 часа")
-    change_24h: str = Field(default="0", description="Изменение за 24 часа")
-    high_24h: str = Field(default="0", description="Максимум за 24 часа")
-    low_24h: str = Field(default="0", description="Минимум за 24 часа")
-
-
-class MarketData(BaseModel):
-    """Полные рыночные данные."""
-    success: bool = Field(..., description="Успешность запроса")
-    inst_id: str = Field(..., description="Идентификатор инструмента (например, BTC-USDT)")
-    market_data: Dict[str, Any] = Field(..., description="Рыночные данные (стакан, свечи)")
-    user_data: Dict[str, Any] = Field(..., description="Пользовательские данные (балансы, активные ордера)")
-    indicators: Dict[str, Any] = Field(..., description="Текущие индикаторы рынка")
-    timestamp: str = Field(..., description="Временная метка данных")
-    message: Optional[str] = Field(None, description="Сообщение от API")
-
-
-class OrdersResponse(BaseModel):
-    """Ответ с активными ордерами."""
+    current_price: str = "0"  # Текущая цена
+    volume_24h: str = "0"  # Объем за 24 часа
+    change_24h: str = "0"  # Изменение за 24 часа
+    high_24h: str = "0"  # Максимум за 24 часа
+    low_24h: str = "0"  # Минимум за 24 часа
+
+
+# Порядок полей свечи в формате списка (OKX): [ts, open, high, low, close, volume, ...]
+_CANDLE_FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+class CandleArrays(msgspec.Struct, frozen=True):
+    """
+    Свечи OHLCV в виде колонок numpy (structure of arrays).
+    
+    Строится один раз из списка свечей, после чего индикаторы
+    считаются векторно, без повторного разбора строк.
+    """
+    ts: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    
+    @classmethod
+    def from_candles(cls, candles: List[Any]) -> "CandleArrays":
+        """
+        Создает колонки из списка свечей.
+        
+        Args:
+            candles: Свечи в виде словарей (поля Candle) или списков [ts, o, h, l, c, vol, ...]
+            
+        Returns:
+            Колонки свечей с dtype float64
+        """
+        columns = np.empty((len(_CANDLE_FIELDS), len(candles)), dtype=np.float64)
+        for i, candle in enumerate(candles):
+            if isinstance(candle, dict):
+                for j, field in enumerate(_CANDLE_FIELDS):
+                    columns[j, i] = float(candle.get(field, 0) or 0)
+            else:
+                for j in range(len(_CANDLE_FIELDS)):
+                    columns[j, i] = float(candle[j])
+        return cls(*columns)
+
+
+class MarketData(msgspec.Struct, frozen=True, gc=False):
+    """
+    Полные рыночные данные.
+    
+    msgspec-структура: декодируется напрямую из байтов ответа API,
+    без промежуточного словаря и валидации pydantic.
+    """
+    success: bool  # Успешность запроса
+    inst_id: str  # Идентификатор инструмента (например, BTC-USDT)
+    market_data: Dict[str, Any]  # Рыночные данные (стакан, свечи)
+    user_data: Dict[str, Any]  # Пользовательские данные (балансы, активные ордера)
+    indicators: Dict[str, Any]  # Текущие индикаторы рынка
+    timestamp: str  # Временная метка данных
+    message: Optional[str] = None  # Сообщение от API
+    
+    def candle_arrays(self, timeframe: str = "1m") -> CandleArrays:
+        """
+        Возвращает свечи указанного таймфрейма в виде колонок numpy.
+        
+        Args:
+            timeframe: Таймфрейм свечей (ключ в market_data['candles'])
+            
+        Returns:
+            Колонки свечей
+        """
+        candles = self.market_data.get('candles', {}).get(timeframe, [])
+        return CandleArrays.from_candles(candles)
+
+
+@pydantic_dataclass(slots=True, frozen=True, config=ConfigDict(extra='ignore'))
+class OrdersResponse:
+    """Ответ с активными ордерами (валидируется: приходит от внешнего API)."""
     success: bool = Field(..., description="Успешность запроса")
     message: str = Field(..., description="Сообщение")
-    orders: List[ActiveOrder] = Field(default=[], description="Список активных ордеров")
+    orders: List[ActiveOrder] = Field(default_factory=list, description="Список активных ордеров")
 
 
-class OrderData(BaseModel):
+@dataclass(slots=True, frozen=True)
+class OrderData:
     """Данные ордера."""
-    order_id: str = Field(..., description="ID ордера")
-    symbol: str = Field(..., description="Торговая пара")
-    side: str = Field(..., description="Сторона сделки (buy/sell)")
-    amount: float = Field(..., description="Количество")
-    price: Optional[float] = Field(None, description="Цена")
-    order_type: OrderType = Field(..., description="Тип ордера")
-    status: OrderStatus = Field(..., description="Статус ордера")
-    take_profit: Optional[float] = Field(None, description="Take Profit")
-    stop_loss: Optional[float] = Field(None, description="Stop Loss")
-
-
-class TradingDecision(BaseModel):
+    order_id: str  # ID ордера
+    symbol: str  # Торговая пара
+    side: str  # Сторона сделки (buy/sell)
+    amount: float  # Количество
+    order_type: OrderType  # Тип ордера
+    status: OrderStatus  # Статус ордера
+    price: Optional[float] = None  # Цена
+    take_profit: Optional[float] = None  # Take Profit
+    stop_loss: Optional[float] = None  # Stop Loss
+
+
+@dataclass(slots=True, frozen=True)
+class TradingDecision:
     """Торговое решение."""
-    status: TradingStatus = Field(..., description="Статус решения")
-    response: str = Field(..., description="Объяснение решения")
-    confidence: float = Field(default=0.0, ge=0.0, le=1.0, description="Уверенность в решении (0-1)")
-    risk_level: str = Field(default="medium", description="Уровень риска (low/medium/high)")
+    status: TradingStatus  # Статус решения
+    response: str  # Объяснение решения
+    confidence: float = 0.0  # Уверенность в решении (0-1)
+    risk_level: str = "medium"  # Уровень риска (low/medium/high)
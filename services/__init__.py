@@ -1,7 +1,7 @@
 """Сервисные модули."""
-from .api_client import TradingAPIClient
+from .api_client import TradingAPIClient, close_shared_client
 from .openai_handler import OpenAIHandler
 from .openai_simple_handler import OpenAISimpleHandler
 from .telegram_notifier import TelegramNotifier
 
-__all__ = ['TradingAPIClient', 'OpenAIHandler', 'OpenAISimpleHandler', 'TelegramNotifier']
+__all__ = ['TradingAPIClient', 'close_shared_client', 'OpenAIHandler', 'OpenAISimpleHandler', 'TelegramNotifier']
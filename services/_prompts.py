@@ -0,0 +1,501 @@
+"""Промпты и сообщения для OpenAI, общие для обработчиков."""
+from functools import lru_cache
+from typing import Any, Dict, Final, List, Optional, Sequence
+
+import orjson
+
+from models.trading import CandleArrays, MarketData
+from utils.indicators import compute_indicators, format_indicators
+
+
+def to_prompt_json(value: Any) -> str:
+    """
+    Сериализует данные для вставки в сообщение OpenAI.
+    
+    Args:
+        value: Данные для сериализации
+        
+    Returns:
+        Компактная JSON строка (orjson, не-ASCII символы без экранирования)
+    """
+    # Без отступов: модели они не нужны, а токены оплачиваются
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+# Позиционные колонки строк стакана и свечей: схема описана один раз в неизменной
+# инструкции, а строки передаются массивами без повторения ключей
+ORDERBOOK_COLUMNS = ("price", "size", "side")
+CANDLE_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+def compact_rows(rows: Sequence[Any], columns: Sequence[str]) -> List[Any]:
+    """
+    Переводит строки-словари в позиционные массивы по заданным колонкам.
+    
+    Args:
+        rows: Строки стакана или свечей (словари либо уже массивы)
+        columns: Порядок колонок
+        
+    Returns:
+        Список массивов; строки, не являющиеся словарями, передаются без изменений
+    """
+    return [
+        [row.get(column) for column in columns] if isinstance(row, dict) else row
+        for row in rows
+    ]
+
+
+# Глубина свечей по таймфреймам, по которой считаются индикаторы
+TIMEFRAME_LIMITS = {"5m": 144, "15m": 96, "1h": 72, "4h": 90, "1d": 90}
+
+
+def trim_market_data(
+    market_data: MarketData,
+    *,
+    ob_depth: int = 20,
+    tf_limits: Dict[str, int] = TIMEFRAME_LIMITS
+) -> Dict[str, Any]:
+    """
+    Обрезает стакан и свечи до объема, который нужен модели.
+    
+    Args:
+        market_data: Рыночные данные
+        ob_depth: Количество уровней стакана на сторону
+        tf_limits: Максимум свечей по таймфреймам (остальные таймфреймы без изменений)
+        
+    Returns:
+        Поверхностная копия market_data с обрезанными списками
+    """
+    trimmed = dict(market_data.market_data)
+    
+    orderbook = trimmed.get('orderbook')
+    if isinstance(orderbook, dict):
+        trimmed['orderbook'] = {
+            **orderbook,
+            'bids': orderbook.get('bids', [])[:ob_depth],
+            'asks': orderbook.get('asks', [])[:ob_depth]
+        }
+    elif isinstance(orderbook, list):
+        trimmed['orderbook'] = orderbook[:ob_depth * 2]
+    
+    candles = trimmed.get('candles')
+    if isinstance(candles, dict):
+        trimmed['candles'] = {
+            timeframe: rows[:tf_limits[timeframe]] if timeframe in tf_limits else rows
+            for timeframe, rows in candles.items()
+        }
+    
+    return trimmed
+
+
+# Строгая JSON-схема торгового решения (Structured Outputs).
+# strict-режим требует все поля в required, поэтому поля других решений - nullable
+DECISION_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "decision",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "status": {"type": "string", "enum": ["pause", "buy", "sell", "cancel"]},
+                "response": {"type": "string"},
+                "buy_amount": {"type": ["number", "null"]},
+                "take_profit_percent": {"type": ["number", "null"]},
+                "stop_loss_percent": {"type": ["number", "null"]},
+                "sell_amount": {"type": ["number", "null"]},
+                "order_id": {"type": ["string", "null"]}
+            },
+            "required": [
+                "status", "response", "buy_amount", "take_profit_percent",
+                "stop_loss_percent", "sell_amount", "order_id"
+            ],
+            "additionalProperties": False
+        }
+    }
+}
+
+
+# Строгая схема ответа проверки ордеров: покупка здесь недопустима на уровне декодирования
+ORDERS_CHECK_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "orders_decision",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "status": {"type": "string", "enum": ["pause", "cancel", "sell"]},
+                "response": {"type": "string"},
+                "order_id": {"type": ["string", "null"]},
+                "sell_amount": {"type": ["number", "null"]}
+            },
+            "required": ["status", "response", "order_id", "sell_amount"],
+            "additionalProperties": False
+        }
+    }
+}
+
+# Индикаторы, передаваемые модели, в фиксированном порядке
+INDICATOR_KEYS = ("current_price", "volume_24h", "change_24h", "high_24h", "low_24h")
+
+
+def indicators_json(market_data: MarketData) -> str:
+    """
+    Сериализует индикаторы одним JSON блоком вместо построчного форматирования чисел.
+    
+    Args:
+        market_data: Рыночные данные
+        
+    Returns:
+        Компактная JSON строка с индикаторами
+    """
+    indicators = market_data.indicators
+    return to_prompt_json({key: indicators.get(key, '0') for key in INDICATOR_KEYS})
+
+
+# Валюты баланса, передаваемые модели
+BALANCE_CURRENCIES = ("USDT", "BTC")
+
+
+def balances_json(market_data: MarketData) -> str:
+    """
+    Сериализует балансы торговой пары одним JSON блоком.
+    
+    Args:
+        market_data: Рыночные данные
+        
+    Returns:
+        Компактная JSON строка с балансами
+    """
+    balances = market_data.user_data.get('balances', {})
+    return to_prompt_json({currency: balances.get(currency, 0) for currency in BALANCE_CURRENCIES})
+
+
+# Системный промпт трейдера: обычная строка с единственным полем {target_apy},
+# форматируется один раз при создании обработчика
+TRADER_PROMPT_TEMPLATE: Final[str] = """Ты — профессиональный трейдер по паре BTC-USDT.  
+Цель — достичь годовой доходности {target_apy}% при минимальных рисках.  
+Ты работаешь как опытный трейдер: анализируешь рынок, прогнозируешь движение цены и принимаешь решения в реальном времени. \
+Ты не робот с фиксированными правилами, а трейдер, который адаптируется к текущим условиям.
+
+### Основные принципы
+- Анализируй рынок по таймфреймам: 5m, 15m, 1h, 4h, 1d.  
+- Используй RSI, SMA20/50, MACD, ATR, объёмы, стакан, свечные паттерны.  
+- Прогнозируй движение на 5–60 минут вперёд: ВВЕРХ, ВНИЗ или НЕОПРЕДЕЛЕННО.  
+- Покупка только при прогнозе "ВВЕРХ".  
+- Все сделки должны иметь SL и TP, рассчитанные динамически.  
+
+### Риск-менеджмент
+- Риск на сделку: 1–2% от капитала (в зависимости от силы сигнала).  
+- Риск на серию усреднений: не более 5–6% капитала.  
+- Соотношение риск/прибыль (RRR) ≥ 1:2.  
+- Если рынок не даёт условий для RRR ≥ 1:2 → пауза, сделка не открывается.  
+- Ошибки и убытки учитываются через риск: если серия сделок убыточна, автоматически снижается размер следующих входов.  
+
+### Размер сделки
+- Рассчитывается через риск и выбранный SL:  
+  риск_USDT = баланс * (риск% / 100)  
+  размер_сделки = риск_USDT / (SL% в цене)  
+- Таким образом, риск фиксирован в %, а размер сделки адаптируется под рынок.  
+
+### TP и SL (динамические)
+- SL: за ближайший уровень поддержки (для лонга) либо = 1–1.5×ATR.  
+- TP: рассчитывается так, чтобы RRR ≥ 1:2, либо до ближайшего сильного сопротивления, может подтягиваться выше при продолжении движения.  
+- Управление: при росте цены и подтверждении тренда подтягивай SL вверх (трейлинг) и поднимай TP. При достижении 50% от TP фиксируй 50% позиции (частичная продажа).  
+
+### Усреднение
+- Допускается усреднение, если рынок идёт против позиции, но сохраняются признаки продолжения тренда.  
+- Каждое усреднение учитывает общий риск: совокупный риск серии ≤ 5–6% капитала.  
+- Усреднение вверх (добавление в растущую позицию) допустимо при усилении сигнала.  
+
+### Сила сигнала
+- Слабый (RSI 30–40, слабый объём) → риск 1%  
+- Средний (RSI <30, подтверждён тренд) → риск 1.5%  
+- Сильный (RSI <25, объём выше среднего, SMA20 > SMA50) → риск 2%  
+- Отличный (RSI <20 + уровни + объём) → риск 2% и допускается усреднение вверх  
+
+### Логика SELL
+- Продажа по достижению TP или SL.  
+- Частичная фиксация при +50% TP.  
+- Полное закрытие при смене прогноза на ВНИЗ.  
+- Возможна корректировка TP/SL в процессе сделки (трейлинг и адаптация).  
+
+### Режим паузы
+- Прогноз = ВНИЗ → пауза.  
+- Прогноз = НЕОПРЕДЕЛЕННО → пауза, либо удержание текущей позиции без новых входов.  
+- Если нет условий для RRR ≥ 1:2 → пауза.  
+
+### ФОРМАТ ОТВЕТА
+Ответ — JSON-объект по схеме decision (схема проверяется API). Поля, не относящиеся к решению, — null.
+- pause: только response ("ПРОГНОЗ: [ВВЕРХ/ВНИЗ/НЕОПРЕДЕЛЕННО] - причина паузы")
+- buy: response ("ПРОГНОЗ: ВВЕРХ - объяснение входа"), buy_amount (USDT), take_profit_percent, stop_loss_percent
+- sell: response, sell_amount (BTC)
+- cancel: response, order_id"""
+
+
+# Исходный системный промпт ассистента (Assistants API, устаревший OpenAIHandler):
+# шаблон с единственным полем {target_apy}, фигурные скобки JSON экранированы
+ASSISTANT_TRADER_PROMPT_TEMPLATE: Final[str] = """Ты — профессиональный трейдер по паре BTC-USDT.
+Твоя задача — постоянно анализировать рынок, адаптироваться к текущим условиям и вести торговлю так, чтобы достичь заданной цели доходности при минимально возможных рисках.
+Ты действуешь не как жёсткий торговый робот, а как опытный трейдер: используешь технический и контекстный анализ, \
+следишь за балансом, открытыми позициями и реакцией рынка в режиме реального времени.
+
+ЦЕЛЬ:
+target_apy = {target_apy}  # целевая годовая доходность в %
+
+АЛГОРИТМ РАБОТЫ:
+1. При первом сообщении я передаю историю рыночных данных:
+   - 5m: 144 баров
+   - 15m: 96 баров  
+   - 1h: 72 бара
+   - 4h: 90 баров
+   - 1d: 90 баров
+   Плюс: стакан (топ-20 bid/ask с объёмами и изменениями), баланс, открытые ордера.
+   Ты анализируешь данные, формируешь стартовую торговую картину и начальные параметры риск-менеджмента для достижения цели.
+
+2. Каждые 5 минут я передаю обновления:
+   - последние 10 минутных свечей (OHLCV с timestamp);
+   - актуальный стакан (топ-20 bid/ask, объёмы, изменения);
+   - текущий баланс;
+   - открытые ордера.
+   Ты обновляешь внутреннюю историю, пересчитываешь все старшие таймфреймы (5m, 15m, 1h, 4h, 1d), индикаторы (RSI, MACD, SMA, EMA, ATR и т.д.) и корректируешь стратегию.
+
+РИСК-МЕНЕДЖМЕНТ (динамический):
+- Сам подбираешь риск на сделку, RRR, размер позиции, количество одновременно открытых сделок и условия перевода в безубыток, исходя из текущего состояния рынка и цели доходности.
+- В периоды высокой волатильности — снижаешь риск, при стабильном рынке — можешь увеличивать.
+- Если рынок без направления — приостанавливаешь торговлю или действуешь минимальными объёмами.
+
+АНАЛИЗ РЫНКА:
+- Смотришь на тренды по разным ТФ, ключевые уровни, реакцию в стакане, объёмы, паттерны, волатильность (ATR), поведение покупателей и продавцов.
+- Учитываешь контекст: настроение рынка (risk-on/risk-off), корреляцию с другими активами, аномальные движения.
+- Если условия неблагоприятны, пропускаешь сделку и объясняешь причину.
+
+ФОРМАТ ОТВЕТА:
+Всегда отвечай ТОЛЬКО в формате JSON без дополнительного текста:
+
+Для паузы:
+{{
+  "status": "pause",
+  "response": "краткое объяснение почему выбрана пауза"
+}}
+
+Для покупки:
+{{
+  "status": "buy", 
+  "response": "краткое объяснение решения",
+  "buy_amount": числовое_значение_в_USDT,
+  "take_profit_percent": процент_тейк_профита,
+  "stop_loss_percent": процент_стоп_лосса
+}}
+
+Для продажи:
+{{
+  "status": "sell",
+  "response": "краткое объяснение решения", 
+  "sell_amount": количество_BTC_для_продажи
+}}
+
+Для отмены ордера:
+{{
+  "status": "cancel",
+  "response": "краткое объяснение решения",
+  "order_id": "ID_ордера_для_отмены"
+}}
+
+ВАЖНО: Ответ должен быть валидным JSON без дополнительных символов или текста!"""
+
+
+# Системный промпт проверки активных ордеров (без параметров)
+ORDERS_CHECK_PROMPT: Final[str] = """Ты — профессиональный трейдер по паре BTC-USDT, который анализирует активные ордера.
+
+ТВОЯ ЗАДАЧА: Проанализировать каждый ордер и принять решение об отмене или продаже BTC.
+
+АНАЛИЗ ОРДЕРОВ:
+1. **ВРЕМЯ ЖИЗНИ**: Ордер > 60 минут → ОТМЕНИТЬ
+2. **ОТКЛОНЕНИЕ ЦЕНЫ**: Цена ушла от ордера >2% → ОТМЕНИТЬ  
+3. **ТРЕНД**: Тренд развернулся против позиции → ОТМЕНИТЬ
+4. **ОБЪЕМЫ**: Объемы торгов упали значительно → ОТМЕНИТЬ
+
+КРИТЕРИИ ОТМЕНЫ:
+- Ордер висит >60 минут без движения
+- Цена ушла от цены ордера на >2% в неблагоприятную сторону
+- Тренд развернулся против позиции
+- Объемы торгов упали значительно
+
+КРИТЕРИИ ПРОДАЖИ BTC:
+- Если есть BTC на балансе и нет активных ордеров → ПРОДАТЬ ВСЕ
+- Если баланс USDT < 10 → ПРОДАТЬ ЧАСТЬ BTC
+
+ДОПУСТИМЫЕ СТАТУСЫ: "pause", "cancel", "sell"
+ЗАПРЕЩЕННЫЕ СТАТУСЫ: "buy", "strategy", "analysis", "hold", "wait"
+
+КРИТИЧЕСКИ ВАЖНО - ФОРМАТ ОТВЕТА:
+Отвечай СТРОГО в формате JSON БЕЗ ```json``` БЕЗ дополнительного текста!
+
+PAUSE (ничего не делать):
+{"status": "pause", "response": "ПРОГНОЗ: [ВВЕРХ/ВНИЗ/НЕОПРЕДЕЛЕННО] - все ордера в порядке"}
+
+CANCEL (отменить ордер):
+{"status": "cancel", "response": "ПРОГНОЗ: [ВВЕРХ/ВНИЗ/НЕОПРЕДЕЛЕННО] - причина отмены", "order_id": "ID_ордера"}
+
+SELL (продать BTC):
+{"status": "sell", "response": "причина продажи", "sell_amount": число_BTC}
+
+НЕ ДОБАВЛЯЙ никаких маркеров! Только чистый JSON!"""
+
+# Неизменные инструкции к данным: отдельное сообщение перед снимком рынка,
+# чтобы префикс запроса (система + инструкция) совпадал байт в байт между вызовами
+INITIAL_STATIC_PREAMBLE: Final[str] = (
+    "Следующее сообщение — начальные данные для анализа: торговая пара и время, стакан, "
+    "индикаторы по таймфреймам (рассчитаны по свечам), балансы, количество активных ордеров "
+    "и текущие индикаторы рынка.\n"
+    f"Уровни стакана переданы массивами [{', '.join(ORDERBOOK_COLUMNS)}].\n"
+    "Проанализируй данные и сформируй начальную торговую стратегию. Ответь в формате JSON."
+)
+
+UPDATE_STATIC_PREAMBLE: Final[str] = (
+    "Следующее сообщение — обновление рыночных данных: статистика, стакан (топ-5), "
+    "последние минутные свечи (топ-3), балансы, активные ордера, текущие индикаторы, "
+    "индикаторы по свечам обновления и индикаторы старших таймфреймов из начальных данных.\n"
+    f"Уровни стакана переданы массивами [{', '.join(ORDERBOOK_COLUMNS)}], свечи — массивами [{', '.join(CANDLE_COLUMNS)}].\n"
+    "Обнови свой анализ и прими торговое решение на основе ДОСТУПНЫХ данных. Ответь в формате JSON."
+)
+
+
+def timeframe_indicators_block(candles: Dict[str, List[Any]]) -> str:
+    """
+    Считает индикаторы по свечам каждого таймфрейма.
+    
+    Args:
+        candles: Свечи по таймфреймам
+        
+    Returns:
+        Строки вида "5m: RSI14=31.2 SMA20=64000.5 ..." или "Нет свечей"
+    """
+    return "\n".join(
+        f"{timeframe}: {format_indicators(compute_indicators(CandleArrays.from_candles(rows)))}"
+        for timeframe, rows in candles.items()
+        if rows
+    ) or "Нет свечей"
+
+
+def build_initial_message(market_data: MarketData, timeframe_lines: Optional[str] = None) -> str:
+    """
+    Подготавливает начальное сообщение с полными данными.
+    
+    Args:
+        market_data: Аналитические данные рынка
+        timeframe_lines: Готовый блок индикаторов по таймфреймам (по умолчанию считается здесь)
+        
+    Returns:
+        Сообщение для OpenAI
+    """
+    # Вместо сырых свечей передаем рассчитанные по ним индикаторы
+    market = trim_market_data(market_data)
+    candles = market.pop('candles', None) or {}
+    if isinstance(market.get('orderbook'), list):
+        market['orderbook'] = compact_rows(market['orderbook'], ORDERBOOK_COLUMNS)
+    if timeframe_lines is None:
+        timeframe_lines = timeframe_indicators_block(candles)
+    
+    return f"""НАЧАЛЬНЫЕ ДАННЫЕ ДЛЯ АНАЛИЗА:
+
+Торговая пара: {market_data.inst_id}
+Время: {market_data.timestamp}
+
+РЫНОЧНЫЕ ДАННЫЕ:
+{to_prompt_json(market)}
+
+ИНДИКАТОРЫ ПО ТАЙМФРЕЙМАМ (рассчитаны по свечам):
+{timeframe_lines}
+
+ПОЛЬЗОВАТЕЛЬСКИЕ ДАННЫЕ:
+Баланс: {balances_json(market_data)}
+Активные ордера: {len(market_data.user_data.get('active_orders', []))}
+
+ИНДИКАТОРЫ (change_24h в %):
+{indicators_json(market_data)}"""
+
+
+@lru_cache(maxsize=32)
+def _format_update_message(
+    timestamp: str,
+    orderbook_size: int,
+    candles_size: int,
+    orders_size: int,
+    orderbook_json: str,
+    candles_json: str,
+    balances_block: str,
+    orders_json: str,
+    indicators_block: str,
+    timeframe_lines: str,
+    initial_context: str
+) -> str:
+    """
+    Собирает текст сообщения обновления из уже сериализованных частей.
+    
+    Кешируется: повтор идентичного снимка (ретраи, неподвижная цена)
+    возвращает готовую строку.
+    
+    Returns:
+        Сообщение для OpenAI
+    """
+    return f"""ОБНОВЛЕНИЕ РЫНОЧНЫХ ДАННЫХ:
+
+Время: {timestamp}
+
+СТАТИСТИКА ДАННЫХ:
+📊 Стакан ордеров: {orderbook_size} записей
+📈 Минутные свечи: {candles_size} записей  
+📋 Активные ордера: {orders_size} записей
+
+СТАКАН ОРДЕРОВ (топ-5):
+{orderbook_json}
+
+ПОСЛЕДНИЕ СВЕЧИ (1m, топ-3):
+{candles_json}
+
+БАЛАНС:
+{balances_block}
+
+АКТИВНЫЕ ОРДЕРА:
+{orders_json}
+
+ТЕКУЩИЕ ИНДИКАТОРЫ (change_24h в %):
+{indicators_block}
+
+ИНДИКАТОРЫ ПО СВЕЧАМ ОБНОВЛЕНИЯ:
+{timeframe_lines}{initial_context}"""
+
+
+def build_update_message(market_data: MarketData, initial_context: str = "") -> str:
+    """
+    Подготавливает сообщение с обновленными данными.
+    
+    Args:
+        market_data: Данные мониторинга рынка
+        initial_context: Индикаторы старших таймфреймов из начальных данных
+            (пусто, если контекст хранится на стороне OpenAI, например в треде ассистента)
+        
+    Returns:
+        Сообщение для OpenAI
+    """
+    orderbook = market_data.market_data.get('orderbook', [])
+    candles = market_data.market_data.get('candles', {}).get('1m', [])
+    active_orders = market_data.user_data.get('active_orders', [])
+    
+    # Срезы сериализуются в строки - они же служат хешируемым ключом кеша
+    return _format_update_message(
+        str(market_data.timestamp),
+        len(orderbook),
+        len(candles),
+        len(active_orders),
+        to_prompt_json(compact_rows(orderbook[:5], ORDERBOOK_COLUMNS)),
+        to_prompt_json(compact_rows(candles[:3], CANDLE_COLUMNS)),
+        balances_json(market_data),
+        to_prompt_json(active_orders),
+        indicators_json(market_data),
+        timeframe_indicators_block(market_data.market_data.get('candles', {})),
+        f"\n\nИНДИКАТОРЫ СТАРШИХ ТАЙМФРЕЙМОВ (из начальных данных):\n{initial_context}" if initial_context else ""
+    )
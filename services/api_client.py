@@ -1,13 +1,64 @@
 """Клиент для работы с торговым API."""
 import asyncio
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, Optional, Tuple
 import httpx
+import msgspec
+import orjson
 from loguru import logger
 
 from config.settings import Settings
 from models.trading import MarketData
 
 
+# Таймауты HTTP клиента (увеличенное чтение - для аналитики)
+_HTTP_TIMEOUT = httpx.Timeout(
+    connect=10.0,   # Время на установку соединения
+    read=60.0,      # Время на получение ответа (для аналитики)
+    write=10.0,     # Время на отправку запроса
+    pool=5.0        # Время для повторного использования соединений
+)
+
+# Пул keep-alive соединений
+_HTTP_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=20,
+    keepalive_expiry=60.0
+)
+
+# Общий для процесса HTTP клиент: все экземпляры TradingAPIClient делят один пул
+_shared_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_shared_client() -> httpx.AsyncClient:
+    """
+    Возвращает общий HTTP/2 клиент, создавая его при первом обращении.
+    
+    Returns:
+        Асинхронный HTTP клиент с пулом соединений
+    """
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = httpx.AsyncClient(
+            http2=True,
+            timeout=_HTTP_TIMEOUT,
+            transport=httpx.AsyncHTTPTransport(http2=True, limits=_HTTP_LIMITS, retries=1),
+            headers={
+                "Content-Type": "application/json",
+                "User-Agent": "TradeBot/1.0.0"
+            }
+        )
+    return _shared_client
+
+
+async def close_shared_client() -> None:
+    """Закрывает общий HTTP клиент торгового API; вызывается один раз при остановке бота."""
+    global _shared_client
+    if _shared_client is not None and not _shared_client.is_closed:
+        await _shared_client.aclose()
+    _shared_client = None
+
+
 class TradingAPIClient:
     """
     Клиент для взаимодействия с торговым API.
@@ -27,24 +78,28 @@ class TradingAPIClient:
         self.demo_mode = settings.demo_mode
         self.timeout = 30.0
         
-        # Настройки HTTP клиента с увеличенными таймаутами
-        timeout_config = httpx.Timeout(
-            connect=10.0,   # Время на установку соединения
-            read=60.0,      # Время на получение ответа (для аналитики)
-            write=10.0,     # Время на отправку запроса
-            pool=5.0        # Время для повторного использования соединений
-        )
+        self.client = _get_shared_client()
         
-        self.client = httpx.AsyncClient(
-            timeout=timeout_config,
-            headers={
-                "Content-Type": "application/json",
-                "User-Agent": "TradeBot/1.0.0"
-            }
-        )
+        # Декодер рыночных данных создается один раз на клиент
+        self._market_decoder = msgspec.json.Decoder(MarketData)
+        
+        # Ограничение одновременных запросов (не больше, чем влезает в пул соединений)
+        self._request_semaphore = asyncio.Semaphore(settings.max_concurrent_requests)
+        
+        # Кеш мониторинга: (время получения, данные) и блокировка для объединения запросов
+        self._monitor_cache: Optional[Tuple[float, MarketData]] = None
+        self._monitor_ttl = settings.monitor_cache_ttl
+        self._monitor_lock = asyncio.Lock()
+        
+        # URL горячих эндпоинтов и параметр demo не меняются - вычисляем один раз
+        self._analytics_url = f"{self.base_url}/api/v1/market/analytics"
+        self._monitor_url = f"{self.base_url}/api/v1/market/monitor"
+        self._demo_params = {"demo": "true" if self.demo_mode else "false"}
+        # Хвост JSON тела ордеров с флагом demo
+        self._demo_suffix = b',"demo":true}' if self.demo_mode else b',"demo":false}'
         
         logger.info(f"Инициализирован API клиент для {self.base_url}")
-        logger.info(f"⏱️ ТАЙМАУТЫ: connect={timeout_config.connect}s, read={timeout_config.read}s, write={timeout_config.write}s")
+        logger.info(f"⏱️ ТАЙМАУТЫ: connect={_HTTP_TIMEOUT.connect}s, read={_HTTP_TIMEOUT.read}s, write={_HTTP_TIMEOUT.write}s")
     
     def _adapt_monitor_data(self, monitor_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -108,19 +163,19 @@ class TradingAPIClient:
             # Маппинг полей из плоской структуры в вложенную
             if 'candles_1m' in monitor_data:
                 adapted['market_data']['candles'] = {'1m': monitor_data['candles_1m']}
-                logger.debug(f"📈 СВЕЧИ 1M: {len(monitor_data['candles_1m'])} записей")
+                logger.debug("📈 СВЕЧИ 1M: {} записей", len(monitor_data['candles_1m']))
             
             if 'orderbook' in monitor_data:
                 adapted['market_data']['orderbook'] = monitor_data['orderbook']
-                logger.debug(f"📊 СТАКАН: {len(monitor_data['orderbook'])} записей")
+                logger.debug("📊 СТАКАН: {} записей", len(monitor_data['orderbook']))
             
             if 'active_orders' in monitor_data:
                 adapted['user_data']['active_orders'] = monitor_data['active_orders']
-                logger.debug(f"📋 АКТИВНЫЕ ОРДЕРА: {len(monitor_data['active_orders'])} записей")
+                logger.debug("📋 АКТИВНЫЕ ОРДЕРА: {} записей", len(monitor_data['active_orders']))
             
             if 'balances' in monitor_data:
                 adapted['user_data']['balances'] = monitor_data['balances']
-                logger.debug(f"💰 БАЛАНСЫ: {monitor_data['balances']}")
+                logger.debug("💰 БАЛАНСЫ: {}", monitor_data['balances'])
             
             # Копируем остальные поля
             excluded_keys = ['market_data', 'user_data', 'indicators', 'candles_1m', 'orderbook', 'active_orders', 'balances']
@@ -145,50 +200,51 @@ class TradingAPIClient:
         await self.close()
     
     async def close(self) -> None:
-        """Закрывает HTTP клиент."""
-        await self.client.aclose()
+        """
+        Освобождает клиент.
+        
+        Общий HTTP клиент процесса не закрывается - его закрывает close_shared_client().
+        """
         logger.info("API клиент закрыт")
     
-    async def _make_request(
+    async def _request_raw(
         self, 
         method: str, 
-        endpoint: str, 
+        url: str, 
         params: Optional[Dict[str, Any]] = None,
-        json_data: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
+        json_data: Optional[Dict[str, Any]] = None,
+        content: Optional[bytes] = None
+    ) -> bytes:
         """
-        Выполняет HTTP запрос к API.
+        Выполняет HTTP запрос к API и возвращает тело ответа без декодирования.
         
         Args:
             method: HTTP метод (GET, POST, etc.)
-            endpoint: Конечная точка API
+            url: Полный URL конечной точки API
             params: URL параметры
             json_data: JSON данные для отправки
+            content: Готовое JSON тело запроса (вместо json_data)
             
         Returns:
-            Ответ от API в виде словаря
+            Сырое тело ответа
             
         Raises:
             httpx.HTTPError: При ошибке HTTP запроса
         """
-        url = f"{self.base_url}{endpoint}"
+        if content is None and json_data is not None:
+            content = orjson.dumps(json_data)
+        
+        logger.debug("Выполняется {} запрос к {}", method, url)
         
+        # try охватывает только сетевую часть; статус проверяется сравнением ниже
         try:
-            logger.debug(f"Выполняется {method} запрос к {url}")
-            
-            response = await self.client.request(
-                method=method,
-                url=url,
-                params=params,
-                json=json_data
-            )
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            logger.debug(f"Получен ответ от {url}: {response.status_code}")
-            return data
-            
+            async with self._request_semaphore:
+                response = await self.client.request(
+                    method=method,
+                    url=url,
+                    params=params,
+                    content=content
+                )
         except httpx.RemoteProtocolError as e:
             logger.error(f"🔌 ОШИБКА СОЕДИНЕНИЯ: сервер разорвал соединение для {url}: {e}")
             logger.info("💡 Возможно, запрос обрабатывается слишком долго. Попробуйте еще раз.")
@@ -203,6 +259,47 @@ class TradingAPIClient:
         except Exception as e:
             logger.error(f"❌ НЕОЖИДАННАЯ ОШИБКА при запросе к {url}: {e}")
             raise
+        
+        status_code = response.status_code
+        if status_code >= 400:
+            logger.error(f"🌐 ОШИБКА HTTP запроса к {url}: статус {status_code}")
+            raise httpx.HTTPStatusError(
+                f"HTTP {status_code} для {url}",
+                request=response.request,
+                response=response
+            )
+        
+        logger.debug("Получен ответ от {}: {}", url, status_code)
+        return response.content
+    
+    async def _make_request(
+        self, 
+        method: str, 
+        endpoint: str, 
+        params: Optional[Dict[str, Any]] = None,
+        json_data: Optional[Dict[str, Any]] = None,
+        content: Optional[bytes] = None
+    ) -> Dict[str, Any]:
+        """
+        Выполняет HTTP запрос к API.
+        
+        Args:
+            method: HTTP метод (GET, POST, etc.)
+            endpoint: Конечная точка API
+            params: URL параметры
+            json_data: JSON данные для отправки
+            content: Готовое JSON тело запроса (вместо json_data)
+            
+        Returns:
+            Ответ от API в виде словаря
+            
+        Raises:
+            httpx.HTTPError: При ошибке HTTP запроса
+        """
+        raw = await self._request_raw(
+            method, f"{self.base_url}{endpoint}", params=params, json_data=json_data, content=content
+        )
+        return orjson.loads(raw)
     
     async def get_health(self) -> Dict[str, Any]:
         """
@@ -220,15 +317,14 @@ class TradingAPIClient:
         Returns:
             Полные рыночные данные включая исторические свечи
         """
-        params = {"demo": str(self.demo_mode).lower()}
-        
         # Попытки повтора при проблемах с соединением
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                data = await self._make_request("GET", "/api/v1/market/analytics", params=params)
-                logger.info(f"Получены аналитические данные для {data.get('inst_id', 'N/A')}")
-                return MarketData(**data)
+                raw = await self._request_raw("GET", self._analytics_url, params=self._demo_params)
+                market_data = self._market_decoder.decode(raw)
+                logger.info(f"Получены аналитические данные для {market_data.inst_id}")
+                return market_data
                 
             except (httpx.RemoteProtocolError, httpx.TimeoutException) as e:
                 if attempt < max_retries - 1:
@@ -244,21 +340,64 @@ class TradingAPIClient:
         """
         Получает текущие данные мониторинга рынка (последние 10 минутных свечей).
         
+        Повторные вызовы в пределах monitor_cache_ttl возвращают закешированные
+        данные, а одновременные вызовы объединяются в один запрос.
+        
         Returns:
             Текущие рыночные данные
         """
-        params = {"demo": str(self.demo_mode).lower()}
-        data = await self._make_request("GET", "/api/v1/market/monitor", params=params)
+        cached = self._monitor_cache
+        if cached is not None and time.monotonic() - cached[0] < self._monitor_ttl:
+            return cached[1]
+        
+        async with self._monitor_lock:
+            # Пока ждали блокировку, данные мог получить другой вызов
+            cached = self._monitor_cache
+            if cached is not None and time.monotonic() - cached[0] < self._monitor_ttl:
+                return cached[1]
+            
+            market_data = await self._fetch_market_monitor()
+            self._monitor_cache = (time.monotonic(), market_data)
+            return market_data
+    
+    async def _fetch_market_monitor(self) -> MarketData:
+        """
+        Запрашивает данные мониторинга рынка у API.
+        
+        Returns:
+            Текущие рыночные данные
+        """
+        raw = await self._request_raw("GET", self._monitor_url, params=self._demo_params)
+        
+        # Ответ уже во вложенном формате MarketData - декодируем байты за один проход
+        try:
+            market_data = self._market_decoder.decode(raw)
+            logger.debug("Получены данные мониторинга для {}", market_data.inst_id)
+            return market_data
+        except msgspec.ValidationError:
+            pass
+        
+        # Плоский формат мониторинга - разбираем в словарь и адаптируем
+        data = orjson.loads(raw)
         
         # Логируем структуру ответа для диагностики
-        logger.info(f"📊 СТРУКТУРА ОТВЕТА MONITOR: {list(data.keys())}")
-        logger.debug(f"📊 ПОЛНЫЙ ОТВЕТ MONITOR: {data}")
+        logger.opt(lazy=True).info("📊 СТРУКТУРА ОТВЕТА MONITOR: {}", lambda: list(data.keys()))
+        logger.trace("📊 ПОЛНЫЙ ОТВЕТ MONITOR: {}", data)
         
         # Адаптируем данные мониторинга к формату MarketData
         adapted_data = self._adapt_monitor_data(data)
         
-        logger.debug(f"Получены данные мониторинга для {adapted_data.get('inst_id', 'N/A')}")
-        return MarketData(**adapted_data)
+        logger.debug("Получены данные мониторинга для {}", adapted_data.get('inst_id', 'N/A'))
+        
+        # Доверенный внутренний API: собираем структуру без проверки типов.
+        # Конструктор Struct не принимает лишние ключи, поэтому оставляем только поля MarketData
+        if self.settings.trust_api:
+            return MarketData(**{
+                field: adapted_data[field]
+                for field in MarketData.__struct_fields__
+                if field in adapted_data
+            })
+        return msgspec.convert(adapted_data, MarketData)
     
     async def place_buy_order(
         self, 
@@ -277,15 +416,15 @@ class TradingAPIClient:
         Returns:
             Результат размещения ордера
         """
-        json_data = {
-            "buy_amount": amount,
-            "take_profit_percent": take_profit_percent,
-            "stop_loss_percent": stop_loss_percent,
-            "demo": self.demo_mode
-        }
+        body = b'{"buy_amount":%b,"take_profit_percent":%b,"stop_loss_percent":%b%b' % (
+            orjson.dumps(amount),
+            orjson.dumps(take_profit_percent),
+            orjson.dumps(stop_loss_percent),
+            self._demo_suffix
+        )
         
         logger.info(f"Размещение ордера на покупку: {amount} USDT, TP: {take_profit_percent}%, SL: {stop_loss_percent}%")
-        return await self._make_request("POST", "/api/v1/buy", json_data=json_data)
+        return await self._make_request("POST", "/api/v1/buy", content=body)
     
     async def place_sell_order(self, amount: float) -> Dict[str, Any]:
         """
@@ -297,13 +436,10 @@ class TradingAPIClient:
         Returns:
             Результат размещения ордера
         """
-        json_data = {
-            "sell_amount": amount,
-            "demo": self.demo_mode
-        }
+        body = b'{"sell_amount":' + orjson.dumps(amount) + self._demo_suffix
         
         logger.info(f"Размещение ордера на продажу: {amount} BTC")
-        return await self._make_request("POST", "/api/v1/sell", json_data=json_data)
+        return await self._make_request("POST", "/api/v1/sell", content=body)
     
     async def get_orders(self) -> Dict[str, Any]:
         """
@@ -312,9 +448,8 @@ class TradingAPIClient:
         Returns:
             Список активных ордеров
         """
-        params = {"demo": str(self.demo_mode).lower()}
         logger.info("Получение списка активных ордеров")
-        return await self._make_request("GET", "/api/v1/orders", params=params)
+        return await self._make_request("GET", "/api/v1/orders", params=self._demo_params)
     
     async def cancel_order(self, order_id: str) -> Dict[str, Any]:
         """
@@ -326,13 +461,10 @@ class TradingAPIClient:
         Returns:
             Результат отмены ордера
         """
-        json_data = {
-            "order_id": order_id,
-            "demo": self.demo_mode
-        }
+        body = b'{"order_id":' + orjson.dumps(order_id) + self._demo_suffix
         
         logger.info(f"Отмена ордера: {order_id}")
-        return await self._make_request("POST", "/api/v1/cancel", json_data=json_data)
+        return await self._make_request("POST", "/api/v1/cancel", content=body)
     
     async def cancel_order_by_inst_id(self, inst_id: str, ord_id: str) -> Dict[str, Any]:
         """
@@ -350,9 +482,8 @@ class TradingAPIClient:
             "ordId": ord_id
         }
         
-        params = {"demo": str(self.demo_mode).lower()}
         logger.info(f"Отмена ордера {ord_id} для {inst_id}")
-        return await self._make_request("POST", "/api/v1/orders/cancel", json_data=json_data, params=params)
+        return await self._make_request("POST", "/api/v1/orders/cancel", json_data=json_data, params=self._demo_params)
     
     async def sell_all_btc(self, inst_id: str = "BTC-USDT") -> Dict[str, Any]:
         """
@@ -0,0 +1,67 @@
+"""Общий HTTP транспорт и клиенты OpenAI."""
+from typing import Dict, Optional
+import httpx
+import openai
+
+
+# Таймауты запросов к OpenAI: быстрый отказ на соединении, запас на генерацию ответа
+_OPENAI_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# Пул keep-alive соединений с запасом под всплески: ретраи, fallback и несколько ботов
+# в одном процессе не должны выстраиваться в очередь за свободным соединением
+_OPENAI_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=50
+)
+
+# Общий для процесса HTTP клиент: обработчики OpenAI делят одно TLS соединение
+_shared_http_client: Optional[httpx.AsyncClient] = None
+
+# Общие для процесса клиенты OpenAI по API ключу
+_shared_clients: Dict[str, openai.AsyncOpenAI] = {}
+
+
+def get_openai_http_client() -> httpx.AsyncClient:
+    """
+    Возвращает общий HTTP/2 клиент для OpenAI, создавая его при первом обращении.
+    
+    Returns:
+        Асинхронный HTTP клиент для передачи в openai.AsyncOpenAI(http_client=...)
+    """
+    global _shared_http_client
+    if _shared_http_client is None or _shared_http_client.is_closed:
+        _shared_http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=_OPENAI_TIMEOUT,
+            # Повторы выполняет tenacity в обработчике, транспорт их не дублирует
+            transport=httpx.AsyncHTTPTransport(http2=True, limits=_OPENAI_LIMITS, retries=0)
+        )
+    return _shared_http_client
+
+
+def get_openai_client(api_key: str) -> openai.AsyncOpenAI:
+    """
+    Возвращает общий асинхронный клиент OpenAI для API ключа.
+    
+    Args:
+        api_key: API ключ OpenAI
+        
+    Returns:
+        Асинхронный клиент OpenAI поверх общего HTTP/2 транспорта
+    """
+    client = _shared_clients.get(api_key)
+    if client is None or client.is_closed():
+        client = openai.AsyncOpenAI(api_key=api_key, http_client=get_openai_http_client())
+        _shared_clients[api_key] = client
+    return client
+
+
+async def close_openai_clients() -> None:
+    """Закрывает общие клиенты OpenAI и их HTTP транспорт."""
+    global _shared_http_client
+    for client in _shared_clients.values():
+        await client.close()
+    _shared_clients.clear()
+    if _shared_http_client is not None and not _shared_http_client.is_closed:
+        await _shared_http_client.aclose()
+    _shared_http_client = None
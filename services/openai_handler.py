@@ -1,11 +1,20 @@
-"""Обработчик для работы с OpenAI API."""
-import json
-from typing import Dict, Any, Optional
-import openai
+"""Обработчик для работы с OpenAI Assistants API (устарел, см. OpenAISimpleHandler)."""
+import asyncio
+import warnings
+from typing import Optional
 from loguru import logger
 
 from config.settings import Settings
 from models.trading import MarketData
+from services.openai_client import get_openai_client
+from services._prompts import (
+    ASSISTANT_TRADER_PROMPT_TEMPLATE,
+    DECISION_RESPONSE_FORMAT,
+    INITIAL_STATIC_PREAMBLE,
+    UPDATE_STATIC_PREAMBLE,
+    build_initial_message,
+    build_update_message
+)
 
 
 class OpenAIHandler:
@@ -13,6 +22,10 @@ class OpenAIHandler:
     Обработчик для взаимодействия с OpenAI API.
     
     Управляет созданием ассистента, потоков сообщений и обработкой ответов.
+    
+    Устарел: каждое решение требует лишних запросов (run, поток, сообщения)
+    и хранит состояние потока на сервере. Используйте OpenAISimpleHandler
+    с тем же интерфейсом (initialize, send_initial_data, send_update_data).
     """
     
     def __init__(self, settings: Settings):
@@ -22,15 +35,22 @@ class OpenAIHandler:
         Args:
             settings: Настройки приложения
         """
+        warnings.warn(
+            "OpenAIHandler устарел, используйте OpenAISimpleHandler",
+            DeprecationWarning,
+            stacklevel=2
+        )
         self.settings = settings
-        self.client = openai.OpenAI(
-            api_key=settings.openai_api_key,
+        self.client = get_openai_client(settings.openai_api_key).with_options(
             default_headers={"OpenAI-Beta": "assistants=v2"}
         )
         self.model = settings.openai_model
         self.assistant_id: Optional[str] = None
         self.thread_id: Optional[str] = None
         
+        # Промпт зависит только от настроек - строим один раз
+        self._system_prompt = ASSISTANT_TRADER_PROMPT_TEMPLATE.format_map({"target_apy": settings.target_apy})
+        
         logger.info("Инициализирован OpenAI обработчик")
     
     def get_trader_prompt(self) -> str:
@@ -40,73 +60,7 @@ class OpenAIHandler:
         Returns:
             Текст промпта для OpenAI ассистента
         """
-        return f"""Ты — профессиональный трейдер по паре BTC-USDT.
-Твоя задача — постоянно анализировать рынок, адаптироваться к текущим условиям и вести торговлю так, чтобы достичь заданной цели доходности при минимально возможных рисках.
-Ты действуешь не как жёсткий торговый робот, а как опытный трейдер: используешь технический и контекстный анализ, следишь за балансом, открытыми позициями и реакцией рынка в режиме реального времени.
-
-ЦЕЛЬ:
-target_apy = {self.settings.target_apy}  # целевая годовая доходность в %
-
-АЛГОРИТМ РАБОТЫ:
-1. При первом сообщении я передаю историю рыночных данных:
-   - 5m: 144 баров
-   - 15m: 96 баров  
-   - 1h: 72 бара
-   - 4h: 90 баров
-   - 1d: 90 баров
-   Плюс: стакан (топ-20 bid/ask с объёмами и изменениями), баланс, открытые ордера.
-   Ты анализируешь данные, формируешь стартовую торговую картину и начальные параметры риск-менеджмента для достижения цели.
-
-2. Каждые 5 минут я передаю обновления:
-   - последние 10 минутных свечей (OHLCV с timestamp);
-   - актуальный стакан (топ-20 bid/ask, объёмы, изменения);
-   - текущий баланс;
-   - открытые ордера.
-   Ты обновляешь внутреннюю историю, пересчитываешь все старшие таймфреймы (5m, 15m, 1h, 4h, 1d), индикаторы (RSI, MACD, SMA, EMA, ATR и т.д.) и корректируешь стратегию.
-
-РИСК-МЕНЕДЖМЕНТ (динамический):
-- Сам подбираешь риск на сделку, RRR, размер позиции, количество одновременно открытых сделок и условия перевода в безубыток, исходя из текущего состояния рынка и цели доходности.
-- В периоды высокой волатильности — снижаешь риск, при стабильном рынке — можешь увеличивать.
-- Если рынок без направления — приостанавливаешь торговлю или действуешь минимальными объёмами.
-
-АНАЛИЗ РЫНКА:
-- Смотришь на тренды по разным ТФ, ключевые уровни, реакцию в стакане, объёмы, паттерны, волатильность (ATR), поведение покупателей и продавцов.
-- Учитываешь контекст: настроение рынка (risk-on/risk-off), корреляцию с другими активами, аномальные движения.
-- Если условия неблагоприятны, пропускаешь сделку и объясняешь причину.
-
-ФОРМАТ ОТВЕТА:
-Всегда отвечай ТОЛЬКО в формате JSON без дополнительного текста:
-
-Для паузы:
-{{
-  "status": "pause",
-  "response": "краткое объяснение почему выбрана пауза"
-}}
-
-Для покупки:
-{{
-  "status": "buy", 
-  "response": "краткое объяснение решения",
-  "buy_amount": числовое_значение_в_USDT,
-  "take_profit_percent": процент_тейк_профита,
-  "stop_loss_percent": процент_стоп_лосса
-}}
-
-Для продажи:
-{{
-  "status": "sell",
-  "response": "краткое объяснение решения", 
-  "sell_amount": количество_BTC_для_продажи
-}}
-
-Для отмены ордера:
-{{
-  "status": "cancel",
-  "response": "краткое объяснение решения",
-  "order_id": "ID_ордера_для_отмены"
-}}
-
-ВАЖНО: Ответ должен быть валидным JSON без дополнительных символов или текста!"""
+        return self._system_prompt
     
     async def create_assistant(self) -> str:
         """
@@ -116,11 +70,12 @@ target_apy = {self.settings.target_apy}  # целевая годовая дох
             ID созданного ассистента
         """
         try:
-            assistant = self.client.beta.assistants.create(
+            assistant = await self.client.beta.assistants.create(
                 name="Professional BTC-USDT Trader",
-                instructions=self.get_trader_prompt(),
+                instructions=self._system_prompt,
                 model=self.model,
-                tools=[{"type": "code_interpreter"}],
+                tools=[],
+                response_format=DECISION_RESPONSE_FORMAT,
                 extra_headers={"OpenAI-Beta": "assistants=v2"}
             )
             
@@ -140,7 +95,7 @@ target_apy = {self.settings.target_apy}  # целевая годовая дох
             ID созданного потока
         """
         try:
-            thread = self.client.beta.threads.create(
+            thread = await self.client.beta.threads.create(
                 extra_headers={"OpenAI-Beta": "assistants=v2"}
             )
             self.thread_id = thread.id
@@ -162,7 +117,7 @@ target_apy = {self.settings.target_apy}  # целевая годовая дох
             raise ValueError("Поток не создан. Вызовите create_thread() сначала.")
         
         try:
-            self.client.beta.threads.messages.create(
+            await self.client.beta.threads.messages.create(
                 thread_id=self.thread_id,
                 role="user",
                 content=content,
@@ -174,97 +129,52 @@ target_apy = {self.settings.target_apy}  # целевая годовая дох
             logger.error(f"Ошибка отправки сообщения: {e}")
             raise
     
-    async def run_assistant(self) -> str:
+    async def stream_run(self, content: Optional[str] = None, max_wait_time: int = 120) -> str:
         """
-        Запускает ответ ассистента.
+        Запускает ассистента в режиме стриминга и собирает текст ответа.
         
+        Args:
+            content: Сообщение пользователя, добавляемое в поток тем же запросом, что и запуск
+            max_wait_time: Максимальное время ожидания в секундах
+            
         Returns:
-            ID запуска
+            Текст ответа ассистента
+            
+        Raises:
+            TimeoutError: Если ответ не получен за max_wait_time
         """
         if not self.thread_id or not self.assistant_id:
             raise ValueError("Поток или ассистент не созданы.")
         
-        try:
-            run = self.client.beta.threads.runs.create(
+        additional_messages = [{"role": "user", "content": content}] if content else None
+        
+        async def collect() -> str:
+            chunks = []
+            async with self.client.beta.threads.runs.stream(
                 thread_id=self.thread_id,
                 assistant_id=self.assistant_id,
+                additional_messages=additional_messages,
                 extra_headers={"OpenAI-Beta": "assistants=v2"}
-            )
-            logger.debug(f"Запущен ассистент: {run.id}")
-            return run.id
-            
-        except Exception as e:
-            logger.error(f"Ошибка запуска ассистента: {e}")
-            raise
-    
-    async def wait_for_completion(self, run_id: str, max_wait_time: int = 120) -> bool:
-        """
-        Ждет завершения работы ассистента.
-        
-        Args:
-            run_id: ID запуска
-            max_wait_time: Максимальное время ожидания в секундах
+            ) as stream:
+                async for delta in stream.text_deltas:
+                    chunks.append(delta)
+                run = await stream.get_final_run()
             
-        Returns:
-            True если завершено успешно, False если превышено время ожидания
-        """
-        import asyncio
-        
-        if not self.thread_id:
-            raise ValueError("Поток не создан.")
-        
-        wait_time = 0
-        while wait_time < max_wait_time:
-            try:
-                run = self.client.beta.threads.runs.retrieve(
-                    thread_id=self.thread_id, 
-                    run_id=run_id,
-                    extra_headers={"OpenAI-Beta": "assistants=v2"}
-                )
-                
-                if run.status == "completed":
-                    logger.debug("Ассистент завершил работу")
-                    return True
-                elif run.status == "failed":
-                    logger.error(f"Ассистент завершился с ошибкой: {run.last_error}")
-                    return False
-                
-                await asyncio.sleep(2)
-                wait_time += 2
-                
-            except Exception as e:
-                logger.error(f"Ошибка проверки статуса: {e}")
-                await asyncio.sleep(2)
-                wait_time += 2
-        
-        logger.warning(f"Превышено время ожидания ответа ассистента: {max_wait_time}s")
-        return False
-    
-    async def get_last_message(self) -> str:
-        """
-        Получает последнее сообщение от ассистента.
-        
-        Returns:
-            Текст последнего сообщения
-        """
-        if not self.thread_id:
-            raise ValueError("Поток не создан.")
+            if run.status != "completed":
+                raise RuntimeError(f"Ассистент завершился со статусом {run.status}: {run.last_error}")
+            return "".join(chunks)
         
         try:
-            messages = self.client.beta.threads.messages.list(
-                thread_id=self.thread_id,
-                extra_headers={"OpenAI-Beta": "assistants=v2"}
-            )
-            if not messages.data:
-                raise ValueError("Нет сообщений в потоке")
-            
-            last_message = messages.data[0].content[0].text.value
-            logger.debug("Получено последнее сообщение от ассистента")
-            return last_message
-            
+            text = await asyncio.wait_for(collect(), timeout=max_wait_time)
+        except asyncio.TimeoutError:
+            logger.warning(f"Превышено время ожидания ответа ассистента: {max_wait_time}s")
+            raise TimeoutError("Превышено время ожидания ответа ассистента")
         except Exception as e:
-            logger.error(f"Ошибка получения сообщения: {e}")
+            logger.error(f"Ошибка выполнения ассистента: {e}")
             raise
+        
+        logger.debug("Ассистент завершил работу")
+        return text
     
     async def send_initial_data(self, market_data: MarketData) -> str:
         """
@@ -276,35 +186,9 @@ target_apy = {self.settings.target_apy}  # целевая годовая дох
         Returns:
             Ответ ассистента в формате JSON
         """
-        message = f"""НАЧАЛЬНЫЕ ДАННЫЕ ДЛЯ АНАЛИЗА:
-
-Торговая пара: {market_data.inst_id}
-Время: {market_data.timestamp}
-
-РЫНОЧНЫЕ ДАННЫЕ:
-{json.dumps(market_data.market_data, ensure_ascii=False, indent=2)}
-
-ПОЛЬЗОВАТЕЛЬСКИЕ ДАННЫЕ:
-Баланс USDT: {market_data.user_data.balances.USDT}
-Баланс BTC: {market_data.user_data.balances.BTC}
-Активные ордера: {len(market_data.user_data.active_orders)}
-
-ИНДИКАТОРЫ:
-Текущая цена: {market_data.indicators.current_price}
-Объем 24ч: {market_data.indicators.volume_24h}
-Изменение 24ч: {market_data.indicators.change_24h}%
-Максимум 24ч: {market_data.indicators.high_24h}
-Минимум 24ч: {market_data.indicators.low_24h}
-
-Проанализируй данные и сформируй начальную торговую стратегию. Ответь в формате JSON."""
-
-        await self.send_message(message)
-        run_id = await self.run_assistant()
-        
-        if await self.wait_for_completion(run_id):
-            return await self.get_last_message()
-        else:
-            raise TimeoutError("Превышено время ожидания ответа ассистента")
+        message = f"{INITIAL_STATIC_PREAMBLE}\n\n{build_initial_message(market_data)}"
+        # Сообщение передается вместе с запуском - один запрос вместо двух
+        return await self.stream_run(message)
     
     async def send_update_data(self, market_data: MarketData) -> str:
         """
@@ -316,39 +200,12 @@ target_apy = {self.settings.target_apy}  # целевая годовая дох
         Returns:
             Ответ ассистента в формате JSON
         """
-        message = f"""ОБНОВЛЕНИЕ РЫНОЧНЫХ ДАННЫХ:
-
-Время: {market_data.timestamp}
-
-СТАКАН ОРДЕРОВ:
-{json.dumps(market_data.market_data.get('orderbook', []), ensure_ascii=False, indent=2)}
-
-ПОСЛЕДНИЕ СВЕЧИ (1m):
-{json.dumps(market_data.market_data.get('candles', {}).get('1m', [])[:10], ensure_ascii=False, indent=2)}
-
-БАЛАНС:
-USDT: {market_data.user_data.balances.USDT}
-BTC: {market_data.user_data.balances.BTC}
-
-АКТИВНЫЕ ОРДЕРА:
-{json.dumps(market_data.user_data.active_orders, ensure_ascii=False, indent=2)}
-
-ТЕКУЩИЕ ИНДИКАТОРЫ:
-Цена: {market_data.indicators.current_price}
-Объем 24ч: {market_data.indicators.volume_24h}
-
-Обнови свой анализ и прими торговое решение. Ответь в формате JSON."""
-
-        await self.send_message(message)
-        run_id = await self.run_assistant()
-        
-        if await self.wait_for_completion(run_id):
-            return await self.get_last_message()
-        else:
-            raise TimeoutError("Превышено время ожидания ответа ассистента")
+        message = f"{UPDATE_STATIC_PREAMBLE}\n\n{build_update_message(market_data)}"
+        # Сообщение передается вместе с запуском - один запрос вместо двух
+        return await self.stream_run(message)
     
     async def initialize(self) -> None:
         """Инициализирует ассистента и поток."""
-        await self.create_assistant()
-        await self.create_thread()
+        # Ассистент и поток независимы - создаем параллельно
+        await asyncio.gather(self.create_assistant(), self.create_thread())
         logger.info("OpenAI обработчик полностью инициализирован")
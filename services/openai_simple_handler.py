@@ -1,13 +1,137 @@
 """Упрощенный обработчик OpenAI с Responses API."""
 import json
 import asyncio
+import re
 import time
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from functools import cached_property
+from typing import Dict, Any, List, Optional, Tuple, Union
 import openai
+import orjson
+from blake3 import blake3
 from loguru import logger
+from tenacity import RetryCallState, retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 
 from config.settings import Settings
+from handlers.response_parser import clean_json_response
 from models.trading import MarketData
+from services.openai_client import close_openai_clients, get_openai_client
+from services._prompts import (
+    DECISION_RESPONSE_FORMAT,
+    INITIAL_STATIC_PREAMBLE,
+    ORDERS_CHECK_PROMPT,
+    ORDERS_CHECK_RESPONSE_FORMAT,
+    TRADER_PROMPT_TEMPLATE,
+    UPDATE_STATIC_PREAMBLE,
+    build_initial_message,
+    build_update_message,
+    timeframe_indicators_block,
+    trim_market_data
+)
+from utils.rate_limit import TokenBucket
+
+
+class _JsonObjectScanner:
+    """
+    Инкрементальный поиск конца JSON объекта в потоке текста.
+    
+    Считает баланс фигурных скобок вне строк с учетом экранирования.
+    """
+    
+    __slots__ = ("depth", "in_string", "escaped", "started")
+    
+    def __init__(self) -> None:
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.started = False
+    
+    def feed(self, chunk: str) -> int:
+        """
+        Обрабатывает очередной фрагмент текста.
+        
+        Args:
+            chunk: Фрагмент ответа
+            
+        Returns:
+            Индекс символа после закрывающей скобки объекта в chunk, либо -1
+        """
+        for index, char in enumerate(chunk):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = self.started
+            elif char == "{":
+                self.depth += 1
+                self.started = True
+            elif char == "}" and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    return index + 1
+        return -1
+
+
+# Размер кеша решений для близких рыночных снимков
+_DECISION_CACHE_SIZE = 64
+
+
+# Временные ошибки OpenAI, после которых запрос повторяется (APITimeoutError - подкласс APIConnectionError)
+_RETRYABLE_OPENAI_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError
+)
+
+
+def _log_openai_retry(retry_state: RetryCallState) -> None:
+    """
+    Логирует повтор запроса к OpenAI после временной ошибки.
+    
+    Args:
+        retry_state: Состояние попыток tenacity
+    """
+    logger.warning(
+        "🔁 ВРЕМЕННАЯ ОШИБКА OpenAI ({}), попытка {} - повтор через {:.1f}s",
+        type(retry_state.outcome.exception()).__name__,
+        retry_state.attempt_number,
+        retry_state.next_action.sleep
+    )
+
+
+# Экспоненциальная задержка с полным джиттером: random(0, min(30, 0.5 * 2^attempt))
+_openai_retry = retry(
+    retry=retry_if_exception_type(_RETRYABLE_OPENAI_ERRORS),
+    wait=wait_random_exponential(multiplier=0.5, max=30),
+    stop=stop_after_attempt(5),
+    before_sleep=_log_openai_retry,
+    reraise=True
+)
+
+
+# Лимиты выходных токенов: решение - короткий JSON, начальный анализ допускает
+# более развернутое обоснование
+_MAX_TOKENS_INITIAL = 400
+_MAX_TOKENS_UPDATE = 160
+# Проверка ордеров сохраняет прежний лимит: обоснование на кириллице в response
+# при 160 токенах рискует оборваться посреди JSON
+_MAX_TOKENS_ORDERS_CHECK = 300
+
+
+# Сообщения с неизменными инструкциями к данным (часть кешируемого префикса)
+_INITIAL_PREAMBLE_MESSAGE = {"role": "user", "content": INITIAL_STATIC_PREAMBLE}
+_UPDATE_PREAMBLE_MESSAGE = {"role": "user", "content": UPDATE_STATIC_PREAMBLE}
+
+
+# Допустимые статусы торгового решения
+_VALID_STATUSES = frozenset({'pause', 'buy', 'sell', 'cancel'})
+
+# Статус уже проверенного решения (строгая схема, без вложенных объектов) для выбора TTL кеша
+_STATUS_RE = re.compile(rb'"status"\s*:\s*"(pause|buy|sell|cancel)"')
 
 
 class OpenAISimpleHandler:
@@ -17,6 +141,30 @@ class OpenAISimpleHandler:
     Использует простые чат-завершения вместо сложного Assistants API.
     """
     
+    # Лимиты OpenAI относятся к аккаунту, а не к экземпляру обработчика:
+    # все обработчики с одним API ключом делят семафор и ограничитель частоты
+    _account_limits: Dict[str, Tuple[asyncio.Semaphore, TokenBucket]] = {}
+    
+    @classmethod
+    def _get_account_limits(cls, settings: Settings) -> Tuple[asyncio.Semaphore, TokenBucket]:
+        """
+        Возвращает общие ограничители параллельности и частоты для API ключа.
+        
+        Args:
+            settings: Настройки приложения
+            
+        Returns:
+            Семафор параллельных запросов и ограничитель запросов в минуту
+        """
+        limits = cls._account_limits.get(settings.openai_api_key)
+        if limits is None:
+            limits = (
+                asyncio.Semaphore(settings.openai_max_concurrency),
+                TokenBucket(rpm=settings.openai_rpm)
+            )
+            cls._account_limits[settings.openai_api_key] = limits
+        return limits
+    
     def __init__(self, settings: Settings):
         """
         Инициализация обработчика.
@@ -25,9 +173,11 @@ class OpenAISimpleHandler:
             settings: Настройки приложения
         """
         self.settings = settings
-        self.client = openai.OpenAI(api_key=settings.openai_api_key)
+        self.client = get_openai_client(settings.openai_api_key)
         self.model = settings.openai_model
-        self.conversation_history: List[Dict[str, str]] = []
+        # Начальный анализ с большим контекстом и короткие обновления могут идти на разные модели
+        self.model_initial = settings.openai_model_initial or settings.openai_model
+        self.model_update = settings.openai_model_update or settings.openai_model
         
         # Состояние для обработки ошибок
         self.last_successful_response: Optional[str] = None
@@ -41,8 +191,227 @@ class OpenAISimpleHandler:
         self._min_request_interval = 5  # Минимум 5 секунд между запросами
         self._request_lock = asyncio.Lock()
         
+        # Ограничение параллельности и частоты запросов к OpenAI (лимиты аккаунта)
+        self._semaphore, self._rate_limiter = self._get_account_limits(settings)
+        
+        # Детерминированная генерация; лимит выходных токенов задается по типу запроса
+        self._sampling: Dict[str, Any] = {
+            "temperature": 0,
+            "top_p": 1,
+            "seed": settings.openai_seed
+        }
+        # Кеш решений: ключ -> (момент истечения, решение)
+        self._decision_cache: "OrderedDict[bytes, Tuple[float, str]]" = OrderedDict()
+        self._decision_cache_ttl = settings.decision_cache_ttl
+        self._decision_cache_action_ttl = min(settings.decision_cache_action_ttl, settings.decision_cache_ttl)
+        
+        # Системный промпт (trader_prompt) строится при первом обращении и кешируется.
+        # Неизменный префикс в начале messages попадает под кеширование промптов OpenAI
+        self._orders_system_message = {"role": "system", "content": ORDERS_CHECK_PROMPT}
+        
+        # История диалога не передается: многотаймфреймовый контекст начальных данных
+        # сохраняется здесь и добавляется к каждому обновлению
+        self._initial_context = ""
+        
         logger.info("Инициализирован упрощенный OpenAI обработчик")
     
+    @_openai_retry
+    async def _create_completion(self, **kwargs: Any) -> Any:
+        """
+        Выполняет chat.completions.create с учетом лимитов OpenAI.
+        
+        При временных ошибках (429, сеть, 5xx) запрос повторяется с экспоненциальной
+        задержкой и полным джиттером.
+        
+        Args:
+            **kwargs: Параметры chat.completions.create
+            
+        Returns:
+            Ответ OpenAI
+        """
+        async with self._semaphore, self._rate_limiter:
+            return await self.client.chat.completions.create(**kwargs)
+    
+    @_openai_retry
+    async def _stream_completion(self, **kwargs: Any) -> Tuple[str, Any]:
+        """
+        Выполняет потоковый chat.completions.create и возвращает текст до закрытия JSON объекта.
+        
+        Поток дочитывается до конца: usage приходит последним чанком, после finish_reason.
+        
+        Args:
+            **kwargs: Параметры chat.completions.create
+            
+        Returns:
+            Текст JSON объекта и usage
+        """
+        async with self._semaphore, self._rate_limiter:
+            stream = await self.client.chat.completions.create(
+                stream=True,
+                stream_options={"include_usage": True},
+                **kwargs
+            )
+            scanner = _JsonObjectScanner()
+            chunks: List[str] = []
+            usage = None
+            object_closed = False
+            started_at = time.perf_counter()
+            try:
+                async for chunk in stream:
+                    if chunk.usage:
+                        usage = chunk.usage
+                    if object_closed or not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    if not chunks:
+                        logger.debug("⚡ TTFT: {:.3f}s", time.perf_counter() - started_at)
+                    end = scanner.feed(delta)
+                    if end != -1:
+                        # Текст после объекта отбрасываем, но ждем чанк с usage
+                        chunks.append(delta[:end])
+                        object_closed = True
+                        continue
+                    chunks.append(delta)
+            finally:
+                await stream.close()
+        logger.debug("⏱️ ОТВЕТ OPENAI ПОЛУЧЕН ЗА {:.3f}s", time.perf_counter() - started_at)
+        return "".join(chunks), usage
+    
+    @staticmethod
+    def _decision_cache_key(market_data: MarketData, is_initial: bool) -> bytes:
+        """
+        Вычисляет ключ кеша решений по рыночному снимку, округленному до корзин.
+        
+        Близкие снимки (цена в пределах $1, изменение за 24ч с точностью 0.1%,
+        баланс, ордера) дают один ключ и одно решение. Баланс и ордера входят
+        в ключ целиком, поэтому решение не переживает изменение позиции.
+        Индикаторы по свечам в ключ не входят: мониторинг отдает около 10 минутных
+        свечей, которых не хватает ни на RSI14, ни на SMA20.
+        
+        Args:
+            market_data: Рыночные данные
+            is_initial: Первый запрос или обновление
+            
+        Returns:
+            BLAKE3 хеш корзин снимка
+        """
+        balances = market_data.user_data.get('balances', {})
+        order_ids = sorted(
+            str(order.get('ordId', ''))
+            for order in market_data.user_data.get('active_orders', [])
+            if isinstance(order, dict)
+        )
+        try:
+            price = float(market_data.indicators.get('current_price', 0) or 0)
+            usdt = float(balances.get('USDT', 0) or 0)
+            btc = float(balances.get('BTC', 0) or 0)
+            change_24h = float(market_data.indicators.get('change_24h', 0) or 0)
+        except (TypeError, ValueError):
+            price = usdt = btc = change_24h = 0.0
+        
+        buckets = (
+            "initial" if is_initial else "update",
+            round(price),
+            round(change_24h, 1),
+            round(usdt),
+            round(btc * price),
+            ",".join(order_ids)
+        )
+        return blake3("|".join(map(str, buckets)).encode()).digest()
+    
+    def _get_cached_decision(self, key: bytes) -> Optional[str]:
+        """
+        Возвращает решение из кеша, если оно не устарело.
+        
+        Args:
+            key: Ключ кеша
+            
+        Returns:
+            JSON ответ с торговым решением или None
+        """
+        entry = self._decision_cache.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, decision = entry
+        if time.monotonic() > expires_at:
+            del self._decision_cache[key]
+            return None
+        
+        self._decision_cache.move_to_end(key)
+        return decision
+    
+    def _decision_ttl(self, decision: str) -> float:
+        """
+        Возвращает время жизни решения в кеше по его статусу.
+        
+        Повтор паузы безвреден. Повтор buy/sell/cancel из кеша возможен только при
+        неизменных балансе и ордерах (они входят в ключ), то есть когда прошлое
+        действие еще не исполнено - поэтому такие решения живут меньше.
+        
+        Args:
+            decision: JSON ответ с торговым решением
+            
+        Returns:
+            decision_cache_ttl для паузы, decision_cache_action_ttl для остальных статусов
+        """
+        match = _STATUS_RE.search(decision.encode())
+        if match is not None and match.group(1) == b"pause":
+            return self._decision_cache_ttl
+        return self._decision_cache_action_ttl
+    
+    def _remember_decision(self, key: bytes, decision: str) -> None:
+        """
+        Сохраняет решение в LRU кеш на время, зависящее от статуса (см. _decision_ttl).
+        
+        Args:
+            key: Ключ кеша
+            decision: JSON ответ с торговым решением
+        """
+        ttl = self._decision_ttl(decision)
+        if ttl <= 0:
+            return
+        
+        self._decision_cache[key] = (time.monotonic() + ttl, decision)
+        self._decision_cache.move_to_end(key)
+        if len(self._decision_cache) > _DECISION_CACHE_SIZE:
+            self._decision_cache.popitem(last=False)
+    
+    @cached_property
+    def trader_prompt(self) -> str:
+        """Промпт профессионального трейдера (форматируется один раз)."""
+        return TRADER_PROMPT_TEMPLATE.format_map({"target_apy": self.settings.target_apy})
+    
+    @cached_property
+    def _system_message(self) -> Dict[str, str]:
+        """Системное сообщение с промптом трейдера (один объект на все запросы)."""
+        return {"role": "system", "content": self.trader_prompt}
+    
+    @cached_property
+    def _prompt_cache_key(self) -> str:
+        """Стабильный ключ кеширования промптов OpenAI: хеш неизменного префикса."""
+        return blake3(self.trader_prompt.encode()).hexdigest()[:32]
+    
+    def _static_prefix(self, is_initial: bool) -> List[Dict[str, str]]:
+        """
+        Возвращает неизменную часть messages: системный промпт и инструкцию к данным.
+        
+        Args:
+            is_initial: Первый запрос или обновление
+            
+        Returns:
+            Сообщения префикса (одни и те же объекты для всех запросов)
+        """
+        return [self._system_message, _INITIAL_PREAMBLE_MESSAGE if is_initial else _UPDATE_PREAMBLE_MESSAGE]
+    
+    def invalidate_prompt(self) -> None:
+        """Сбрасывает кешированный промпт, например после изменения target_apy."""
+        self.__dict__.pop("trader_prompt", None)
+        self.__dict__.pop("_system_message", None)
+        self.__dict__.pop("_prompt_cache_key", None)
+    
     def get_trader_prompt(self) -> str:
         """
         Возвращает промпт профессионального трейдера с дополнениями по торговой логике и безопасности.
@@ -50,76 +419,7 @@ class OpenAISimpleHandler:
         Returns:
             Текст промпта для OpenAI ассистента
         """
-        return f"""Ты — профессиональный трейдер по паре BTC-USDT.  
-Цель — достичь годовой доходности {self.settings.target_apy}% при минимальных рисках.  
-Ты работаешь как опытный трейдер: анализируешь рынок, прогнозируешь движение цены и принимаешь решения в реальном времени. Ты не робот с фиксированными правилами, а трейдер, который адаптируется к текущим условиям.
-
-### Основные принципы
-- Анализируй рынок по таймфреймам: 5m, 15m, 1h, 4h, 1d.  
-- Используй RSI, SMA20/50, MACD, ATR, объёмы, стакан, свечные паттерны.  
-- Прогнозируй движение на 5–60 минут вперёд: ВВЕРХ, ВНИЗ или НЕОПРЕДЕЛЕННО.  
-- Покупка только при прогнозе "ВВЕРХ".  
-- Все сделки должны иметь SL и TP, рассчитанные динамически.  
-
-### Риск-менеджмент
-- Риск на сделку: 1–2% от капитала (в зависимости от силы сигнала).  
-- Риск на серию усреднений: не более 5–6% капитала.  
-- Соотношение риск/прибыль (RRR) ≥ 1:2.  
-- Если рынок не даёт условий для RRR ≥ 1:2 → пауза, сделка не открывается.  
-- Ошибки и убытки учитываются через риск: если серия сделок убыточна, автоматически снижается размер следующих входов.  
-
-### Размер сделки
-- Рассчитывается через риск и выбранный SL:  
-  риск_USDT = баланс * (риск% / 100)  
-  размер_сделки = риск_USDT / (SL% в цене)  
-- Таким образом, риск фиксирован в %, а размер сделки адаптируется под рынок.  
-
-### TP и SL (динамические)
-- SL: за ближайший уровень поддержки (для лонга) либо = 1–1.5×ATR.  
-- TP: рассчитывается так, чтобы RRR ≥ 1:2, либо до ближайшего сильного сопротивления, может подтягиваться выше при продолжении движения.  
-- Управление: при росте цены и подтверждении тренда подтягивай SL вверх (трейлинг) и поднимай TP. При достижении 50% от TP фиксируй 50% позиции (частичная продажа).  
-
-### Усреднение
-- Допускается усреднение, если рынок идёт против позиции, но сохраняются признаки продолжения тренда.  
-- Каждое усреднение учитывает общий риск: совокупный риск серии ≤ 5–6% капитала.  
-- Усреднение вверх (добавление в растущую позицию) допустимо при усилении сигнала.  
-
-### Сила сигнала
-- Слабый (RSI 30–40, слабый объём) → риск 1%  
-- Средний (RSI <30, подтверждён тренд) → риск 1.5%  
-- Сильный (RSI <25, объём выше среднего, SMA20 > SMA50) → риск 2%  
-- Отличный (RSI <20 + уровни + объём) → риск 2% и допускается усреднение вверх  
-
-### Логика SELL
-- Продажа по достижению TP или SL.  
-- Частичная фиксация при +50% TP.  
-- Полное закрытие при смене прогноза на ВНИЗ.  
-- Возможна корректировка TP/SL в процессе сделки (трейлинг и адаптация).  
-
-### Режим паузы
-- Прогноз = ВНИЗ → пауза.  
-- Прогноз = НЕОПРЕДЕЛЕННО → пауза, либо удержание текущей позиции без новых входов.  
-- Если нет условий для RRR ≥ 1:2 → пауза.  
-
-### КРИТИЧЕСКИ ВАЖНО - ФОРМАТ ОТВЕТА
-Отвечай СТРОГО в формате JSON БЕЗ markdown разметки, БЕЗ ```json```, БЕЗ дополнительного текста!
-
-PAUSE:
-{{"status": "pause", "response": "ПРОГНОЗ: [ВВЕРХ/ВНИЗ/НЕОПРЕДЕЛЕННО] - причина паузы"}}
-
-BUY:
-{{"status": "buy", "response": "ПРОГНОЗ: ВВЕРХ - объяснение входа", "buy_amount": число_USDT, "take_profit_percent": число_процентов, "stop_loss_percent": число_процентов}}
-
-SELL:
-{{"status": "sell", "response": "причина продажи", "sell_amount": число_BTC}}
-
-CANCEL:
-{{"status": "cancel", "response": "причина отмены", "order_id": "ID_ордера"}}
-
-ДОПУСТИМЫЕ СТАТУСЫ: "pause", "buy", "sell", "cancel"
-ЗАПРЕЩЕННЫЕ СТАТУСЫ: "strategy", "analysis", "hold", "wait"
-
-НЕ ДОБАВЛЯЙ ```json``` или любые другие маркеры! Только чистый JSON!"""
+        return self.trader_prompt
     
     async def _handle_region_error(self) -> Optional[str]:
         """
@@ -154,24 +454,56 @@ CANCEL:
         logger.info(f"⏰ ОЖИДАНИЕ {self.retry_delay} секунд ({self.retry_delay//60} минут)...")
         await asyncio.sleep(self.retry_delay)
     
-    def _is_valid_response(self, response: str) -> bool:
+    def _is_valid_response(self, response: Union[str, bytes]) -> bool:
         """
         Проверяет, содержит ли ответ правильный статус.
         
+        Ответ разбирается один раз: статус проверяется только на верхнем уровне,
+        а оборванный JSON не попадает в кеш или в last_successful_response.
+        
         Args:
             response: Ответ от OpenAI
             
         Returns:
-            True если статус правильный, False в противном случае
+            True если ответ - валидный JSON с правильным статусом, False в противном случае
         """
         try:
-            import json
-            data = json.loads(response.strip())
-            status = data.get('status', '').lower()
-            valid_statuses = ['pause', 'buy', 'sell', 'cancel']
-            return status in valid_statuses
-        except:
+            parsed = orjson.loads(response)
+        except orjson.JSONDecodeError:
             return False
+        return isinstance(parsed, dict) and str(parsed.get('status', '')).lower() in _VALID_STATUSES
+    
+    def _safety_gate(self, market_data: MarketData) -> Optional[str]:
+        """
+        Проверяет детерминированные условия, при которых торговать нечем и запрос к OpenAI не нужен.
+        
+        Args:
+            market_data: Рыночные данные
+            
+        Returns:
+            JSON решения pause, если сработало правило, иначе None
+        """
+        balances = market_data.user_data.get('balances', {})
+        open_orders = len(market_data.user_data.get('active_orders', []))
+        min_amount = self.settings.min_trade_amount
+        try:
+            usdt = float(balances.get('USDT', 0) or 0)
+            btc_value = float(balances.get('BTC', 0) or 0) * float(market_data.indicators.get('current_price', 0) or 0)
+        except (TypeError, ValueError):
+            return None
+        
+        # Продавать нечего: BTC меньше минимальной сделки
+        if btc_value < min_amount:
+            if usdt < min_amount and open_orders == 0:
+                reason = f"safety: нет средств для сделки (USDT {usdt:.2f}, BTC ≈ {btc_value:.2f} USDT)"
+            elif open_orders >= self.settings.max_open_positions:
+                # Новые покупки запрещены лимитом, отмену ордеров выполняет проверка ордеров
+                reason = f"safety: открыто ордеров {open_orders} из {self.settings.max_open_positions}"
+            else:
+                return None
+            return orjson.dumps({"status": "pause", "response": reason}).decode()
+        
+        return None
     
     async def get_trading_decision(self, market_data: MarketData, is_initial: bool = False) -> str:
         """
@@ -184,13 +516,19 @@ CANCEL:
         Returns:
             JSON ответ с торговым решением
         """
+        # Детерминированные правила проверяем локально, без запроса к OpenAI
+        gated_response = self._safety_gate(market_data)
+        if gated_response is not None:
+            logger.info("🛡️ SAFETY: {}", gated_response)
+            return gated_response
+        
         # Защита от дублирования запросов
         async with self._request_lock:
             current_time = time.time()
             
             # Проверяем, не слишком ли часто отправляем запросы (кроме проверки ордеров)
             if not is_initial and (current_time - self._last_request_timestamp) < self._min_request_interval:
-                logger.warning(f"🚫 ЗАПРОС ОТКЛОНЕН: слишком быстро после предыдущего ({current_time - self._last_request_timestamp:.1f}s)")
+                logger.warning("🚫 ЗАПРОС ОТКЛОНЕН: слишком быстро после предыдущего ({:.1f}s)", current_time - self._last_request_timestamp)
                 # Возвращаем последний успешный ответ или паузу
                 if self.last_successful_response:
                     logger.info("🔄 ВОЗВРАЩАЮ ПОСЛЕДНИЙ УСПЕШНЫЙ ОТВЕТ")
@@ -209,9 +547,16 @@ CANCEL:
             # Устанавливаем флаг выполнения запроса
             self._request_in_progress = True
             self._last_request_timestamp = current_time
-            logger.info(f"🔒 БЛОКИРОВКА УСТАНОВЛЕНА - начинаю обработку запроса")
+            logger.debug("🔒 БЛОКИРОВКА УСТАНОВЛЕНА - начинаю обработку запроса")
         
         try:
+            # Рыночное состояние не изменилось в пределах корзин - возвращаем кешированное решение
+            cache_key = self._decision_cache_key(market_data, is_initial)
+            cached_decision = self._get_cached_decision(cache_key)
+            if cached_decision is not None:
+                logger.info("♻️ РЫНОК БЕЗ ИЗМЕНЕНИЙ - ВОЗВРАЩАЮ РЕШЕНИЕ ИЗ КЕША")
+                return cached_decision
+            
             # Подготавливаем сообщение
             if is_initial:
                 message = self._prepare_initial_message(market_data)
@@ -221,74 +566,52 @@ CANCEL:
                 logger.info("🔄 ОТПРАВКА ОБНОВЛЕННЫХ ДАННЫХ В OPENAI")
             
             # Логируем размер сообщения (без полного содержимого - оно очень большое)
-            logger.debug(f"📏 РАЗМЕР СООБЩЕНИЯ: {len(message)} символов")
+            logger.opt(lazy=True).debug("📏 РАЗМЕР СООБЩЕНИЯ: {} символов", lambda: len(message))
             
-            # Добавляем сообщение в историю
-            self.conversation_history.append({
-                "role": "user",
-                "content": message
-            })
+            # Модель не хранит состояние: текущий снимок содержит все нужные данные.
+            # Неизменный префикс впереди, изменчивый снимок - последним сообщением
+            messages = [*self._static_prefix(is_initial), {"role": "user", "content": message}]
             
-            # Подготавливаем сообщения для API
-            messages = [
-                {"role": "system", "content": self.get_trader_prompt()}
-            ] + self.conversation_history
-            
-            # Выполняем запрос к OpenAI
-            response = self.client.chat.completions.create(
-                model=self.model,
+            # Выполняем потоковый запрос к OpenAI (обрывается на закрытии JSON)
+            assistant_response, usage = await self._stream_completion(
+                model=self.model_initial if is_initial else self.model_update,
                 messages=messages,
-                temperature=0.1,
-                max_tokens=500
+                response_format=DECISION_RESPONSE_FORMAT,
+                max_tokens=_MAX_TOKENS_INITIAL if is_initial else _MAX_TOKENS_UPDATE,
+                extra_body={"prompt_cache_key": self._prompt_cache_key},
+                **self._sampling
             )
             
-            assistant_response = response.choices[0].message.content
-            
             # Логируем информацию об использованных токенах
-            if response.usage:
-                logger.info(f"💰 ТОКЕНЫ: input={response.usage.prompt_tokens}, output={response.usage.completion_tokens}, total={response.usage.total_tokens}")
+            if usage:
+                details = getattr(usage, "prompt_tokens_details", None)
+                cached_tokens = getattr(details, "cached_tokens", 0) or 0
+                logger.info(
+                    "💰 ТОКЕНЫ: input={} (cached={}), output={}, total={}",
+                    usage.prompt_tokens, cached_tokens, usage.completion_tokens, usage.total_tokens
+                )
             
             # Логируем полный ответ от OpenAI
-            logger.info(f"🤖 OPENAI ПОЛНЫЙ ОТВЕТ: {assistant_response}")
+            logger.debug("🤖 OPENAI ПОЛНЫЙ ОТВЕТ: {}", assistant_response)
             
-            # Проверяем ответ на правильность статуса
+            # Строгая схема гарантирует допустимый статус; если вокруг JSON оказался
+            # лишний текст - извлекаем объект локально вместо повторного запроса
             if not self._is_valid_response(assistant_response):
-                logger.warning("🔄 НЕПРАВИЛЬНЫЙ ОТВЕТ, ПРОБУЮ ЕЩЕ РАЗ...")
-                # Добавляем уточняющее сообщение
-                clarification = "ВНИМАНИЕ! Твой предыдущий ответ содержал неправильный статус. ИСПОЛЬЗУЙ ТОЛЬКО: pause, buy, sell, cancel. Дай правильный ответ:"
-                self.conversation_history.append({
-                    "role": "user", 
-                    "content": clarification
-                })
-                
-                # Повторный запрос
-                messages = [
-                    {"role": "system", "content": self.get_trader_prompt()}
-                ] + self.conversation_history
-                
-                retry_response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=0.1,
-                    max_tokens=200
-                )
-                
-                assistant_response = retry_response.choices[0].message.content
-                logger.info(f"🔄 ПОВТОРНЫЙ ОТВЕТ OPENAI: {assistant_response}")
+                repaired_response = clean_json_response(assistant_response)
+                if self._is_valid_response(repaired_response):
+                    logger.warning("🧹 ОТВЕТ ИСПРАВЛЕН ЛОКАЛЬНО: извлечен JSON объект")
+                    assistant_response = repaired_response
+            
+            # Несоответствие после исправления возможно только при отказе модели
+            # или обрыве ответа - повторный запрос не поможет
+            if not self._is_valid_response(assistant_response):
+                logger.error("❌ ОТВЕТ НЕ СООТВЕТСТВУЕТ СХЕМЕ РЕШЕНИЯ: {}", assistant_response)
+                raise ValueError("Ответ OpenAI не соответствует схеме торгового решения")
             
             # Сохраняем последний успешный ответ
             self.last_successful_response = assistant_response
             self.retry_count = 0  # Сбрасываем счетчик попыток при успехе
-            
-            # Добавляем ответ в историю
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": assistant_response
-            })
-            
-            # Ограничиваем историю последними 10 сообщениями
-            if len(self.conversation_history) > 10:
-                self.conversation_history = self.conversation_history[-10:]
+            self._remember_decision(cache_key, assistant_response)
             
             logger.success("✅ Получен успешный ответ от OpenAI")
             return assistant_response
@@ -314,39 +637,23 @@ CANCEL:
         finally:
             # Освобождаем блокировку
             self._request_in_progress = False
-            logger.info("🔓 БЛОКИРОВКА СНЯТА - запрос завершен")
+            logger.debug("🔓 БЛОКИРОВКА СНЯТА - запрос завершен")
     
     def _prepare_initial_message(self, market_data: MarketData) -> str:
         """
         Подготавливает начальное сообщение с полными данными.
         
+        Индикаторы по таймфреймам запоминаются как контекст для последующих обновлений.
+        
         Args:
             market_data: Аналитические данные рынка
             
         Returns:
             Сообщение для OpenAI
         """
-        return f"""НАЧАЛЬНЫЕ ДАННЫЕ ДЛЯ АНАЛИЗА:
-
-Торговая пара: {market_data.inst_id}
-Время: {market_data.timestamp}
-
-РЫНОЧНЫЕ ДАННЫЕ:
-{json.dumps(market_data.market_data, ensure_ascii=False, indent=2)}
-
-ПОЛЬЗОВАТЕЛЬСКИЕ ДАННЫЕ:
-Баланс USDT: {market_data.user_data.get('balances', {}).get('USDT', 0)}
-Баланс BTC: {market_data.user_data.get('balances', {}).get('BTC', 0)}
-Активные ордера: {len(market_data.user_data.get('active_orders', []))}
-
-ИНДИКАТОРЫ:
-Текущая цена: {market_data.indicators.get('current_price', '0')}
-Объем 24ч: {market_data.indicators.get('volume_24h', '0')}
-Изменение 24ч: {market_data.indicators.get('change_24h', '0')}%
-Максимум 24ч: {market_data.indicators.get('high_24h', '0')}
-Минимум 24ч: {market_data.indicators.get('low_24h', '0')}
-
-Проанализируй данные и сформируй начальную торговую стратегию. Ответь в формате JSON."""
+        timeframe_lines = timeframe_indicators_block(trim_market_data(market_data).get('candles') or {})
+        self._initial_context = f"Время: {market_data.timestamp}\n{timeframe_lines}"
+        return build_initial_message(market_data, timeframe_lines)
     
     def _prepare_update_message(self, market_data: MarketData) -> str:
         """
@@ -358,39 +665,7 @@ CANCEL:
         Returns:
             Сообщение для OpenAI
         """
-        orderbook = market_data.market_data.get('orderbook', [])
-        candles = market_data.market_data.get('candles', {}).get('1m', [])
-        
-        return f"""ОБНОВЛЕНИЕ РЫНОЧНЫХ ДАННЫХ:
-
-Время: {market_data.timestamp}
-
-СТАТИСТИКА ДАННЫХ:
-📊 Стакан ордеров: {len(orderbook)} записей
-📈 Минутные свечи: {len(candles)} записей  
-📋 Активные ордера: {len(market_data.user_data.get('active_orders', []))} записей
-
-СТАКАН ОРДЕРОВ (топ-5):
-{json.dumps(orderbook[:5], ensure_ascii=False, indent=2)}
-
-ПОСЛЕДНИЕ СВЕЧИ (1m, топ-3):
-{json.dumps(candles[:3], ensure_ascii=False, indent=2)}
-
-БАЛАНС:
-USDT: {market_data.user_data.get('balances', {}).get('USDT', 0)}
-BTC: {market_data.user_data.get('balances', {}).get('BTC', 0)}
-
-АКТИВНЫЕ ОРДЕРА:
-{json.dumps(market_data.user_data.get('active_orders', []), ensure_ascii=False, indent=2)}
-
-ТЕКУЩИЕ ИНДИКАТОРЫ:
-Цена: {market_data.indicators.get('current_price', '0')}
-Объем 24ч: {market_data.indicators.get('volume_24h', '0')}
-Изменение 24ч: {market_data.indicators.get('change_24h', '0')}%
-Максимум 24ч: {market_data.indicators.get('high_24h', '0')}
-Минимум 24ч: {market_data.indicators.get('low_24h', '0')}
-
-Обнови свой анализ и прими торговое решение на основе ДОСТУПНЫХ данных. Ответь в формате JSON."""
+        return build_update_message(market_data, self._initial_context)
     
     async def send_initial_data(self, market_data: MarketData) -> str:
         """
@@ -416,6 +691,82 @@ BTC: {market_data.user_data.get('balances', {}).get('BTC', 0)}
         """
         return await self.get_trading_decision(market_data, is_initial=False)
     
+    async def submit_batch(self, market_data_list: List[MarketData]) -> Optional[str]:
+        """
+        Отправляет пакет запросов решений в OpenAI Batch API (дешевле, без гарантии времени ответа).
+        
+        Подходит для бэктестов и анализа нескольких пар, но не для живой торговли.
+        
+        Args:
+            market_data_list: Рыночные данные, по одному запросу на элемент
+            
+        Returns:
+            ID пакета или None, если Batch API отключен в настройках
+        """
+        if not self.settings.use_batch_api:
+            logger.warning("📦 BATCH API ОТКЛЮЧЕН (USE_BATCH_API=false)")
+            return None
+        
+        lines = []
+        for index, market_data in enumerate(market_data_list):
+            lines.append(orjson.dumps({
+                "custom_id": f"decision-{index}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model_update,
+                    "messages": [
+                        *self._static_prefix(is_initial=False),
+                        {"role": "user", "content": self._prepare_update_message(market_data)}
+                    ],
+                    "prompt_cache_key": self._prompt_cache_key,
+                    "response_format": DECISION_RESPONSE_FORMAT,
+                    "max_tokens": _MAX_TOKENS_UPDATE,
+                    **self._sampling
+                }
+            }))
+        
+        batch_file = await self.client.files.create(
+            file=("decisions.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"📦 ПАКЕТ ОТПРАВЛЕН: {batch.id} ({len(lines)} запросов)")
+        return batch.id
+    
+    async def get_batch_results(self, batch_id: str) -> Optional[Dict[str, str]]:
+        """
+        Проверяет пакет и возвращает ответы, если он обработан.
+        
+        Args:
+            batch_id: ID пакета из submit_batch
+            
+        Returns:
+            Словарь custom_id -> JSON ответ модели, либо None если пакет еще не готов
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status != "completed":
+            logger.info(f"📦 ПАКЕТ {batch_id}: статус {batch.status}")
+            return None
+        
+        output = await self.client.files.content(batch.output_file_id)
+        results = {}
+        for line in output.content.splitlines():
+            if not line:
+                continue
+            row = orjson.loads(line)
+            body = (row.get("response") or {}).get("body") or {}
+            choices = body.get("choices") or []
+            if choices:
+                results[row["custom_id"]] = choices[0]["message"]["content"]
+        
+        logger.info(f"📦 ПАКЕТ {batch_id}: получено {len(results)} ответов")
+        return results
+    
     def get_status(self) -> Dict[str, Any]:
         """
         Возвращает текущий статус обработчика.
@@ -430,7 +781,6 @@ BTC: {market_data.user_data.get('balances', {}).get('BTC', 0)}
             "retry_count": self.retry_count,
             "max_retries": self.max_retries,
             "has_last_response": self.last_successful_response is not None,
-            "conversation_length": len(self.conversation_history),
             "request_in_progress": self._request_in_progress,
             "time_since_last_request": round(time_since_last_request, 1),
             "min_request_interval": self._min_request_interval,
@@ -457,39 +807,22 @@ BTC: {market_data.user_data.get('balances', {}).get('BTC', 0)}
             # Подготавливаем сообщение для проверки ордеров
             message = self._prepare_orders_check_message(orders_data, market_data)
             
-            # Добавляем сообщение в историю
-            self.conversation_history.append({
-                "role": "user",
-                "content": message
-            })
-            
-            # Подготавливаем сообщения для API
-            messages = [
-                {"role": "system", "content": self.get_orders_check_prompt()}
-            ] + self.conversation_history
+            # Как и торговое решение - только системный промпт и текущий снимок
+            messages = [self._orders_system_message, {"role": "user", "content": message}]
             
             # Выполняем запрос к OpenAI
-            response = self.client.chat.completions.create(
+            response = await self._create_completion(
                 model=self.model,
                 messages=messages,
-                temperature=0.1,
-                max_tokens=300
+                response_format=ORDERS_CHECK_RESPONSE_FORMAT,
+                max_tokens=_MAX_TOKENS_ORDERS_CHECK,
+                **self._sampling
             )
             
             assistant_response = response.choices[0].message.content
             
             # Логируем полный ответ от OpenAI
-            logger.info(f"🤖 OPENAI ОТВЕТ ПО ОРДЕРАМ: {assistant_response}")
-            
-            # Добавляем ответ в историю
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": assistant_response
-            })
-            
-            # Ограничиваем историю последними 10 сообщениями
-            if len(self.conversation_history) > 10:
-                self.conversation_history = self.conversation_history[-10:]
+            logger.debug("🤖 OPENAI ОТВЕТ ПО ОРДЕРАМ: {}", assistant_response)
             
             return assistant_response
             
@@ -504,42 +837,7 @@ BTC: {market_data.user_data.get('balances', {}).get('BTC', 0)}
         Returns:
             Текст промпта для проверки ордеров
         """
-        return """Ты — профессиональный трейдер по паре BTC-USDT, который анализирует активные ордера.
-
-ТВОЯ ЗАДАЧА: Проанализировать каждый ордер и принять решение об отмене или продаже BTC.
-
-АНАЛИЗ ОРДЕРОВ:
-1. **ВРЕМЯ ЖИЗНИ**: Ордер > 60 минут → ОТМЕНИТЬ
-2. **ОТКЛОНЕНИЕ ЦЕНЫ**: Цена ушла от ордера >2% → ОТМЕНИТЬ  
-3. **ТРЕНД**: Тренд развернулся против позиции → ОТМЕНИТЬ
-4. **ОБЪЕМЫ**: Объемы торгов упали значительно → ОТМЕНИТЬ
-
-КРИТЕРИИ ОТМЕНЫ:
-- Ордер висит >60 минут без движения
-- Цена ушла от цены ордера на >2% в неблагоприятную сторону
-- Тренд развернулся против позиции
-- Объемы торгов упали значительно
-
-КРИТЕРИИ ПРОДАЖИ BTC:
-- Если есть BTC на балансе и нет активных ордеров → ПРОДАТЬ ВСЕ
-- Если баланс USDT < 10 → ПРОДАТЬ ЧАСТЬ BTC
-
-ДОПУСТИМЫЕ СТАТУСЫ: "pause", "cancel", "sell"
-ЗАПРЕЩЕННЫЕ СТАТУСЫ: "buy", "strategy", "analysis", "hold", "wait"
-
-КРИТИЧЕСКИ ВАЖНО - ФОРМАТ ОТВЕТА:
-Отвечай СТРОГО в формате JSON БЕЗ ```json``` БЕЗ дополнительного текста!
-
-PAUSE (ничего не делать):
-{{"status": "pause", "response": "ПРОГНОЗ: [ВВЕРХ/ВНИЗ/НЕОПРЕДЕЛЕННО] - все ордера в порядке"}}
-
-CANCEL (отменить ордер):
-{{"status": "cancel", "response": "ПРОГНОЗ: [ВВЕРХ/ВНИЗ/НЕОПРЕДЕЛЕННО] - причина отмены", "order_id": "ID_ордера"}}
-
-SELL (продать BTC):
-{{"status": "sell", "response": "причина продажи", "sell_amount": число_BTC}}
-
-НЕ ДОБАВЛЯЙ никаких маркеров! Только чистый JSON!"""
+        return ORDERS_CHECK_PROMPT
     
     def _prepare_orders_check_message(self, orders_data: Dict[str, Any], market_data: MarketData) -> str:
         """
@@ -627,3 +925,8 @@ SELL (продать BTC):
     async def initialize(self) -> None:
         """Инициализация обработчика - ничего дополнительного не требуется."""
         logger.info("Упрощенный OpenAI обработчик готов к работе")
+    
+    async def close(self) -> None:
+        """Закрывает общий клиент OpenAI и его пул соединений."""
+        await close_openai_clients()
+        logger.info("OpenAI клиент закрыт")
@@ -2,12 +2,13 @@
 import asyncio
 import time
 from typing import Optional
+import msgspec
 from loguru import logger
 
 from config.settings import Settings
-from services import TradingAPIClient, TelegramNotifier
+from services import TradingAPIClient, TelegramNotifier, close_shared_client
 from services.openai_simple_handler import OpenAISimpleHandler
-from handlers import ResponseParser
+from handlers import parse_and_validate, parse_orders_decision
 from models.trading import MarketData
 from models.responses import BuyDecision, SellDecision, CancelDecision, PauseDecision, OrdersCancelDecision, OrdersSellDecision, TradingDecision, OrdersDecision
 from utils import setup_logger, log_trading_decision, log_api_call, log_openai_interaction
@@ -31,7 +32,6 @@ class TradingBot:
         self.api_client: Optional[TradingAPIClient] = None
         self.openai_handler: Optional[OpenAISimpleHandler] = None
         self.telegram_notifier: Optional[TelegramNotifier] = None
-        self.parser = ResponseParser()
         self.is_initialized = False
         self.is_running = False
         
@@ -94,7 +94,7 @@ class TradingBot:
             log_openai_interaction("initial", len(response), response_time)
             
             # Парсим и обрабатываем ответ
-            decision = self.parser.parse_and_validate(response)
+            decision = parse_and_validate(response)
             await self.execute_decision(decision, market_data)
             
             logger.success("Начальные данные успешно обработаны")
@@ -132,7 +132,7 @@ class TradingBot:
             log_openai_interaction("orders_check", len(response), response_time)
             
             # Парсим и выполняем решение
-            decision = self.parser.parse_orders_decision(response)
+            decision = parse_orders_decision(response)
             await self.execute_orders_decision(decision)
             
             # Обновляем время последней проверки
@@ -150,7 +150,7 @@ class TradingBot:
             
             # Логируем статус OpenAI обработчика
             status = self.openai_handler.get_status()
-            logger.info(f"📊 СТАТУС OPENAI: попытки {status['retry_count']}/{status['max_retries']}, история: {status['conversation_length']} сообщений")
+            logger.info(f"📊 СТАТУС OPENAI: попытки {status['retry_count']}/{status['max_retries']}")
             logger.info(f"🔒 ЗАЩИТА ОТ ДУБЛИРОВАНИЯ: активен={status['request_in_progress']}, последний запрос {status['time_since_last_request']}s назад, можно запрос={status['can_make_request']}")
             
             # Получаем обновленные данные мониторинга
@@ -168,13 +168,13 @@ class TradingBot:
             log_openai_interaction("update", len(response), response_time)
             
             # Парсим и обрабатываем ответ
-            decision = self.parser.parse_and_validate(response)
+            decision = parse_and_validate(response)
             await self.execute_decision(decision, market_data)
             
             logger.debug("Торговый цикл завершен успешно")
             
         except Exception as e:
-            if "validation errors for MarketData" in str(e):
+            if isinstance(e, msgspec.ValidationError):
                 logger.error(f"📊 ОШИБКА ВАЛИДАЦИИ ДАННЫХ: {e}")
                 logger.info("💡 Возможно, формат ответа API изменился. Проверьте эндпоинт /api/v1/market/monitor")
             else:
@@ -411,8 +411,11 @@ class TradingBot:
         try:
             if self.api_client:
                 await self.api_client.close()
+            await close_shared_client()
             if self.telegram_notifier:
                 await self.telegram_notifier.close()
+            if self.openai_handler:
+                await self.openai_handler.close()
             logger.info("Ресурсы очищены")
         except Exception as e:
             logger.error(f"Ошибка при очистке ресурсов: {e}")
@@ -422,10 +425,10 @@ async def main():
     """Главная функция приложения."""
     try:
         # Загружаем настройки
-        from config.settings import settings
+        from config.settings import get_settings
         
         # Создаем и инициализируем бота
-        bot = TradingBot(settings)
+        bot = TradingBot(get_settings())
         await bot.initialize()
         
         # Запускаем бота
@@ -438,5 +441,15 @@ async def main():
         raise
 
 
+def install_event_loop_policy() -> None:
+    """Включает uvloop, если он установлен (недоступен на Windows)."""
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
 if __name__ == "__main__":
+    install_event_loop_policy()
     asyncio.run(main())
@@ -5,10 +5,15 @@ from .logger import (
     log_api_call, 
     log_openai_interaction
 )
+from .rate_limit import TokenBucket
+from .indicators import compute_indicators, format_indicators
 
 __all__ = [
     'setup_logger',
     'log_trading_decision', 
     'log_api_call', 
-    'log_openai_interaction'
+    'log_openai_interaction',
+    'TokenBucket',
+    'compute_indicators',
+    'format_indicators'
 ]
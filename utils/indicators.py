@@ -0,0 +1,137 @@
+"""Технические индикаторы по свечам OHLCV."""
+from typing import Dict, Optional
+import numpy as np
+
+from models.trading import CandleArrays
+
+
+def _ema_series(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Считает экспоненциальную скользящую среднюю для всего ряда.
+    
+    Args:
+        values: Значения в хронологическом порядке
+        period: Период EMA
+    
+    Returns:
+        Ряд EMA той же длины (стартует со значения SMA первых period точек)
+    """
+    alpha = 2.0 / (period + 1)
+    ema = np.empty_like(values)
+    ema[:period] = values[:period].mean()
+    for i in range(period, len(values)):
+        ema[i] = alpha * values[i] + (1 - alpha) * ema[i - 1]
+    return ema
+
+
+def _rsi(close: np.ndarray, period: int = 14) -> Optional[float]:
+    """
+    Считает RSI по Уайлдеру.
+    
+    Args:
+        close: Цены закрытия в хронологическом порядке
+        period: Период RSI
+    
+    Returns:
+        Последнее значение RSI или None, если свечей недостаточно
+    """
+    if len(close) <= period:
+        return None
+    
+    delta = np.diff(close)
+    gains = np.clip(delta, 0, None)
+    losses = np.clip(-delta, 0, None)
+    
+    avg_gain = gains[:period].mean()
+    avg_loss = losses[:period].mean()
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    
+    if avg_loss == 0:
+        return 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+def _atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> Optional[float]:
+    """
+    Считает средний истинный диапазон (ATR).
+    
+    Args:
+        high: Максимумы в хронологическом порядке
+        low: Минимумы в хронологическом порядке
+        close: Цены закрытия в хронологическом порядке
+        period: Период ATR
+    
+    Returns:
+        Последнее значение ATR или None, если свечей недостаточно
+    """
+    if len(close) <= period:
+        return None
+    
+    prev_close = close[:-1]
+    true_range = np.maximum.reduce([
+        high[1:] - low[1:],
+        np.abs(high[1:] - prev_close),
+        np.abs(low[1:] - prev_close)
+    ])
+    return float(_ema_series(true_range, period)[-1])
+
+
+def compute_indicators(candles: CandleArrays) -> Dict[str, float]:
+    """
+    Считает основные индикаторы по свечам одного таймфрейма.
+    
+    Индикаторы, для которых не хватает свечей, в результат не попадают.
+    
+    Args:
+        candles: Колонки свечей (в любом порядке, сортируются по времени)
+    
+    Returns:
+        Словарь индикаторов: RSI14, SMA20, SMA50, EMA12, EMA26, MACD, MACD_SIGNAL, ATR14, VOL_AVG20
+    """
+    order = np.argsort(candles.ts)
+    close = candles.close[order]
+    high = candles.high[order]
+    low = candles.low[order]
+    volume = candles.volume[order]
+    
+    indicators: Dict[str, float] = {}
+    if len(close) == 0:
+        return indicators
+    
+    rsi = _rsi(close)
+    if rsi is not None:
+        indicators["RSI14"] = rsi
+    for period in (20, 50):
+        if len(close) >= period:
+            indicators[f"SMA{period}"] = float(close[-period:].mean())
+    if len(close) >= 26:
+        ema12 = _ema_series(close, 12)
+        ema26 = _ema_series(close, 26)
+        macd = ema12 - ema26
+        indicators["EMA12"] = float(ema12[-1])
+        indicators["EMA26"] = float(ema26[-1])
+        indicators["MACD"] = float(macd[-1])
+        # Сигнальная линия считается по участку MACD, где обе EMA уже сформированы
+        if len(macd) - 25 >= 9:
+            indicators["MACD_SIGNAL"] = float(_ema_series(macd[25:], 9)[-1])
+    atr = _atr(high, low, close)
+    if atr is not None:
+        indicators["ATR14"] = atr
+    indicators["VOL_AVG20"] = float(volume[-20:].mean())
+    
+    return indicators
+
+
+def format_indicators(indicators: Dict[str, float]) -> str:
+    """
+    Форматирует индикаторы компактной строкой для промпта.
+    
+    Args:
+        indicators: Словарь индикаторов
+    
+    Returns:
+        Строка вида "RSI14=31.2 SMA20=64000.5 ..."
+    """
+    return " ".join(f"{name}={value:.6g}" for name, value in indicators.items())
@@ -0,0 +1,48 @@
+"""Ограничение частоты запросов к внешним API."""
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Асинхронный ограничитель частоты запросов по алгоритму token bucket.
+    
+    Используется как асинхронный контекстный менеджер: вход ждет свободный токен.
+    """
+    
+    def __init__(self, rpm: int):
+        """
+        Инициализация ограничителя.
+        
+        Args:
+            rpm: Допустимое количество запросов в минуту
+        """
+        self.rate = rpm / 60.0
+        self.capacity = max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self) -> None:
+        """Пополняет токены за прошедшее время."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+    
+    async def acquire(self) -> None:
+        """Ждет и забирает один токен."""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1.0:
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1.0
+    
+    async def __aenter__(self) -> "TokenBucket":
+        """Асинхронный контекстный менеджер - вход."""
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Асинхронный контекстный менеджер - выход."""
+        return None